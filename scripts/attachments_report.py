@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Отчет по манифесту загрузок вложений и повтор неудачных загрузок
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+import yaml
+
+# Добавить текущую директорию в PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from parser.attachment_downloader import AttachmentDownloader
+from parser.download_manifest import DownloadManifest
+from parser.utils import setup_logging
+
+
+def print_report(manifest: DownloadManifest, show_failed: bool):
+    """Вывод сводки по манифесту"""
+    summary = manifest.summary()
+
+    print("📊 Манифест загрузок:")
+    for status, count in summary['by_status'].items():
+        print(f"   {status}: {count}")
+    print(f"   Объем скачанного: {summary['total_bytes'] / (1024 * 1024):.1f} MB")
+    print(f"   Ссылок из постов: {summary['references']}")
+
+    if summary['errors']:
+        print()
+        print("⚠ Ошибки по причинам:")
+        for error, count in summary['errors'].items():
+            print(f"   {error}: {count}")
+
+    if show_failed:
+        print()
+        print("❌ Неудачные загрузки:")
+        for entry in manifest.failed():
+            kind = "временная" if entry['retryable'] else "постоянная"
+            print(f"   [{entry['error']}, {kind}] {entry['filename']} - {entry['url']} "
+                  f"(попыток: {entry['attempts']})")
+
+
+async def retry_failed(config: dict):
+    """Повторная загрузка неудачных файлов"""
+    async with AttachmentDownloader(config) as downloader:
+        recovered = await downloader.retry_failed()
+        print(f"✅ Скачано повторно: {recovered}")
+        print()
+        print_report(downloader.manifest, show_failed=False)
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--config', default='config/wix_config.yaml')
+    arg_parser.add_argument('--failed', action='store_true',
+                            help='показать список неудачных загрузок')
+    arg_parser.add_argument('--retry-failed', action='store_true',
+                            help='повторить только неудачные загрузки')
+    args = arg_parser.parse_args()
+    setup_logging()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    if args.retry_failed:
+        asyncio.run(retry_failed(config))
+        return
+
+    manifest_path = Path(config['attachments']['download_dir']) / 'manifest.db'
+    if not manifest_path.exists():
+        print(f"❌ Манифест не найден: {manifest_path}")
+        return
+
+    manifest = DownloadManifest(str(manifest_path))
+    try:
+        print_report(manifest, show_failed=args.failed)
+    finally:
+        manifest.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Проверка сборки импортера в том же окружении, что и при запуске
+run_importer.py и run_bulk_export.py (пакеты importer и parser
+импортируются из scripts/)
+
+Сервер Discourse не нужен: импортер работает в режиме dry_run,
+проверка выполняется во временной рабочей директории (там же создаются
+базы и logs/, как при запуске из корня проекта).
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import traceback
+from pathlib import Path
+
+import yaml
+
+# Добавить текущую директорию в PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from importer.bulk_export import BulkExporter
+from importer.discourse_importer import DiscourseImporter
+
+
+EXAMPLE_CONFIG = Path(__file__).parent.parent / 'config' / 'discourse_config.yaml.example'
+
+
+SAMPLE_POST = {
+    'id': 'check_post',
+    'title': 'Проверка импорта',
+    'author': 'Автор',
+    'created_at': '2020-01-01T10:00:00',
+    'content': '<p>Текст <strong>поста</strong></p><ul><li>пункт</li></ul>',
+    'attachments': [],
+    'comments': [
+        {'id': 'check_comment', 'author': 'Автор', 'content': '<p>Комментарий</p>'},
+    ],
+}
+
+
+def write_config(work_dir: Path, cache_enabled: bool = True) -> Path:
+    """Конфигурация из примера: dry_run, все файлы в рабочей директории"""
+    with open(EXAMPLE_CONFIG, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    config['import']['dry_run'] = True
+    config['import']['delay_between_requests'] = 0
+    # Без сервера: существующие категории и топики не загружаются
+    config['import']['skip_existing_categories'] = False
+    config['import']['skip_existing_topics'] = False
+    config['import']['mapping_db'] = str(work_dir / 'import_mapping.db')
+    config['content']['conversion_cache']['path'] = str(work_dir / 'markdown_cache.db')
+    config['content']['conversion_cache']['enabled'] = cache_enabled
+    config['stats']['save_stats'] = False
+
+    work_dir.mkdir(parents=True, exist_ok=True)
+    config_file = work_dir / 'discourse_config.yaml'
+    with open(config_file, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+
+    return config_file
+
+
+async def check_importer(work_dir: Path):
+    """Создание импортера по файлу конфигурации, как в run_importer.py"""
+    config_file = write_config(work_dir)
+
+    async with DiscourseImporter(str(config_file)) as importer:
+        assert importer.content_pipeline is not None
+
+
+async def check_conversion(work_dir: Path):
+    """Конвертация в пуле процессов, с кэшем и без него"""
+    for cache_enabled in (False, True):
+        config_file = write_config(work_dir / f"cache_{cache_enabled}", cache_enabled)
+
+        async with DiscourseImporter(str(config_file)) as importer:
+            markdown = await importer.content_pipeline.submit(SAMPLE_POST)
+
+        assert len(markdown) == 2, markdown
+        assert '**поста**' in markdown[0], markdown
+        assert 'Комментарий' in markdown[1], markdown
+
+
+def write_export(work_dir: Path) -> Path:
+    """Экспорт из одного поста в формате WixForumParser.save_results"""
+    export_file = work_dir / 'forum_structure_check.json'
+    export = {
+        'categories': [{
+            'id': 'check_category',
+            'title': 'Категория',
+            'subcategories': [{
+                'id': 'check_subcategory',
+                'title': 'Подкатегория',
+                'posts': [SAMPLE_POST],
+            }],
+        }],
+    }
+
+    with open(export_file, 'w', encoding='utf-8') as f:
+        json.dump(export, f, ensure_ascii=False)
+
+    return export_file
+
+
+async def check_import(work_dir: Path):
+    """Импорт экспорта в режиме dry_run, как в run_importer.py"""
+    config_file = write_config(work_dir)
+    export_file = write_export(work_dir)
+
+    async with DiscourseImporter(str(config_file)) as importer:
+        await importer.import_from_json(str(export_file))
+
+    # В режиме dry_run счетчики созданных объектов не растут
+    assert importer.stats['errors'] == 0, importer.stats
+    assert importer.content_pipeline.stats['posts_converted'] == 1, importer.content_pipeline.stats
+
+
+async def check_bulk_export(work_dir: Path):
+    """Запись промежуточной базы, как в run_bulk_export.py"""
+    config_file = write_config(work_dir)
+    export_file = write_export(work_dir)
+
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    exporter = BulkExporter(config, str(work_dir / 'intermediate.db'))
+    try:
+        await exporter.export(str(export_file))
+    finally:
+        exporter.close()
+
+    assert exporter.stats['topics'] == 1, exporter.stats
+    assert exporter.stats['posts'] == 2, exporter.stats
+
+
+async def main() -> int:
+    """Главная функция"""
+    checks = [
+        ("Создание DiscourseImporter", check_importer),
+        ("Конвертация HTML → Markdown", check_conversion),
+        ("Импорт в режиме dry_run", check_import),
+        ("Промежуточная база для bulk импорта", check_bulk_export),
+    ]
+
+    failed = 0
+    cwd = Path.cwd()
+    with tempfile.TemporaryDirectory(prefix='check_importer_') as tmp:
+        os.chdir(tmp)
+
+        for title, check in checks:
+            work_dir = Path(tmp) / check.__name__
+            work_dir.mkdir()
+
+            try:
+                await check(work_dir)
+                print(f"✓ {title}")
+            except Exception:
+                failed += 1
+                print(f"❌ {title}")
+                traceback.print_exc()
+
+        os.chdir(cwd)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Экспорт в промежуточную базу для серверного bulk импорта Discourse
+"""
+
+import asyncio
+import json
+import sqlite3
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Optional, Tuple
+
+from loguru import logger
+from tqdm import tqdm
+
+from parser.attachment_store import sha256_file
+
+from .content_pipeline import ContentPipeline
+from .user_provisioner import make_username
+
+
+# Таблицы по образцу промежуточной базы script/bulk_import/generic_bulk.rb:
+# первичные ключи - исходные ID, связи - по ним же, даты - ISO 8601
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    name TEXT,
+    email TEXT NOT NULL,
+    created_at DATETIME,
+    original_username TEXT
+);
+
+CREATE TABLE IF NOT EXISTS categories (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    description TEXT,
+    slug TEXT,
+    parent_category_id TEXT,
+    position INTEGER,
+    original_url TEXT
+);
+
+CREATE TABLE IF NOT EXISTS topics (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    created_at DATETIME,
+    original_url TEXT
+);
+
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    topic_id TEXT NOT NULL,
+    user_id INTEGER NOT NULL,
+    post_number INTEGER NOT NULL,
+    raw TEXT NOT NULL,
+    created_at DATETIME,
+    placeholders JSON
+);
+
+CREATE TABLE IF NOT EXISTS uploads (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    type TEXT
+);
+"""
+
+# Плейсхолдер загрузки в raw; заменяется ссылкой при серверном импорте
+UPLOAD_PLACEHOLDER = "[upload|{id}]"
+
+
+class BulkExporter:
+    """
+    Потоковая запись экспорта WIX в промежуточную SQLite базу
+
+    Экспорт читается по одной записи, HTML конвертируется в пуле процессов
+    (с кэшем) с ограниченным опережением, строки пишутся пакетами по
+    batch_size в одной транзакции. API Discourse не используется.
+    """
+
+    def __init__(self, config: Dict, output_path: Optional[str] = None):
+        """
+        Инициализация
+
+        Args:
+            config: Конфигурация из discourse_config.yaml
+            output_path: Путь к создаваемой базе (по умолчанию bulk_export.output_db)
+        """
+        self.config = config
+        bulk_config = config.get('bulk_export', {})
+
+        self.output_path = Path(
+            output_path or bulk_config.get('output_db', './data/bulk_import/intermediate.db')
+        )
+        self.batch_size = bulk_config.get('batch_size', 1000)
+        self.lookahead = config['import'].get('conversion_lookahead', 16)
+
+        users_config = config.get('users', {})
+        self.strategy = users_config.get('strategy', 'single_archive')
+        self.username_prefix = users_config.get('username_prefix', '')
+        self.max_username_length = users_config.get('max_username_length', 20)
+        self.archive_username = users_config.get('archive_username', 'wix_archive')
+        self.archive_email = users_config.get('archive_email', 'archive@example.com')
+        self.email_domain = self.archive_email.split('@')[-1]
+
+        self.user_mapping_file: Dict[str, str] = {}
+        if self.strategy == 'mapping_file':
+            mapping_path = Path(users_config.get('mapping_file', './config/user_mapping.json'))
+            if mapping_path.exists():
+                with open(mapping_path, 'r', encoding='utf-8') as f:
+                    self.user_mapping_file = {
+                        author.strip(): username for author, username in json.load(f).items()
+                    }
+
+        self.content_pipeline = ContentPipeline(config)
+
+        # username → ID пользователя, автор → ID пользователя
+        self._user_ids: Dict[str, int] = {}
+        self._author_ids: Dict[str, int] = {}
+        self._taken_usernames = set()
+
+        self._pending_rows = 0
+        self.conn: Optional[sqlite3.Connection] = None
+
+        self.stats = {
+            'users': 0,
+            'categories': 0,
+            'topics': 0,
+            'posts': 0,
+            'uploads': 0,
+            'missing_attachments': 0,
+        }
+
+    def close(self):
+        """Закрыть базу и пул конвертации"""
+        self.content_pipeline.shutdown()
+        if self.conn:
+            self.conn.close()
+
+    def _open(self):
+        """Создание новой базы (существующая перезаписывается)"""
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.output_path.unlink(missing_ok=True)
+
+        self.conn = sqlite3.connect(str(self.output_path))
+        self.conn.executescript(SCHEMA)
+        self.conn.execute("PRAGMA journal_mode = OFF")
+        self.conn.execute("PRAGMA synchronous = OFF")
+
+    def _insert(self, table: str, row: Dict):
+        """Вставка строки; фиксация транзакции каждые batch_size строк"""
+        columns = ', '.join(row)
+        placeholders = ', '.join('?' for _ in row)
+        cursor = self.conn.execute(
+            f"INSERT OR IGNORE INTO {table} ({columns}) VALUES ({placeholders})",
+            tuple(row.values())
+        )
+
+        if cursor.rowcount:
+            self.stats[table] += 1
+
+        self._pending_rows += 1
+        if self._pending_rows >= self.batch_size:
+            self.conn.commit()
+            self._pending_rows = 0
+
+    @staticmethod
+    def _parse_date(value: Optional[str]) -> Optional[str]:
+        """Дата из экспорта в ISO 8601"""
+        if not value:
+            return None
+
+        from dateutil import parser as date_parser
+        try:
+            return date_parser.parse(value).isoformat()
+        except (ValueError, OverflowError):
+            return None
+
+    def _user_id(self, author: Optional[str]) -> int:
+        """ID пользователя для автора (создается при первом упоминании)"""
+        author = (author or '').strip()
+
+        if author in self._author_ids:
+            return self._author_ids[author]
+
+        if not author or self.strategy == 'single_archive':
+            username = self.archive_username
+        elif self.strategy == 'mapping_file':
+            username = self.user_mapping_file.get(author, self.archive_username)
+        else:
+            username = make_username(
+                author, self.username_prefix, self.max_username_length, self._taken_usernames
+            )
+
+        if username not in self._user_ids:
+            user_id = len(self._user_ids) + 1
+            self._user_ids[username] = user_id
+            self._taken_usernames.add(username)
+
+            self._insert('users', {
+                'id': user_id,
+                'username': username,
+                'name': author or username,
+                'email': (
+                    self.archive_email if username == self.archive_username
+                    else f"{username}@{self.email_domain}"
+                ),
+                'created_at': None,
+                'original_username': author or None,
+            })
+
+        self._author_ids[author] = self._user_ids[username]
+        return self._author_ids[author]
+
+    async def _upload_placeholders(self, post: Dict, user_id: int) -> Tuple[list, list]:
+        """
+        Запись вложений поста в uploads
+
+        Returns:
+            (строки плейсхолдеров для raw, описание плейсхолдеров)
+        """
+        lines = []
+        placeholders = []
+
+        for attachment in post.get('attachments', []):
+            local_path = attachment.get('local_path')
+            if not local_path or not Path(local_path).exists():
+                self.stats['missing_attachments'] += 1
+                continue
+
+            upload_id = attachment.get('sha256') or await asyncio.to_thread(
+                sha256_file, Path(local_path)
+            )
+
+            self._insert('uploads', {
+                'id': upload_id,
+                'user_id': user_id,
+                'filename': attachment.get('filename') or Path(local_path).name,
+                'path': str(Path(local_path).resolve()),
+                'type': 'composer',
+            })
+
+            placeholder = UPLOAD_PLACEHOLDER.format(id=upload_id)
+            lines.append(placeholder)
+            placeholders.append({
+                'type': 'upload',
+                'placeholder': placeholder,
+                'upload_id': upload_id,
+                'filename': attachment.get('filename'),
+            })
+
+        return lines, placeholders
+
+    async def _write_post(self, post: Dict, category_id: str, converted: asyncio.Future):
+        """Запись топика, первого поста и комментариев"""
+        markdown = await converted
+        user_id = self._user_id(post.get('author'))
+        created_at = self._parse_date(post.get('created_at'))
+
+        upload_lines, placeholders = await self._upload_placeholders(post, user_id)
+
+        raw = markdown[0]
+        if upload_lines:
+            raw = f"{raw}\n\n" + "\n".join(upload_lines)
+
+        if self.config['content']['add_disclaimer']:
+            disclaimer = self.config['content']['disclaimer_text'].format(
+                date=post.get('created_at', 'неизвестно')
+            )
+            raw = f"{raw}\n\n{disclaimer}"
+
+        self._insert('topics', {
+            'id': post['id'],
+            'title': post['title'],
+            'category_id': category_id,
+            'user_id': user_id,
+            'created_at': created_at,
+            'original_url': post.get('url'),
+        })
+
+        self._insert('posts', {
+            'id': post['id'],
+            'topic_id': post['id'],
+            'user_id': user_id,
+            'post_number': 1,
+            'raw': raw,
+            'created_at': created_at,
+            'placeholders': json.dumps(placeholders, ensure_ascii=False) if placeholders else None,
+        })
+
+        for post_number, (comment, comment_raw) in enumerate(
+            zip(post.get('comments', []), markdown[1:]), 2
+        ):
+            self._insert('posts', {
+                'id': comment.get('id') or f"{post['id']}_comment_{post_number - 1}",
+                'topic_id': post['id'],
+                'user_id': self._user_id(comment.get('author')),
+                'post_number': post_number,
+                'raw': comment_raw,
+                'created_at': self._parse_date(comment.get('created_at')) or created_at,
+                'placeholders': None,
+            })
+
+    async def export(self, json_file: str) -> Path:
+        """
+        Запись промежуточной базы по экспорту
+
+        Args:
+            json_file: Путь к JSON (или JSONL) файлу с экспортированными данными
+
+        Returns:
+            Путь к созданной базе
+        """
+        from slugify import slugify
+
+        from parser.export_reader import (
+            RECORD_CATEGORY, RECORD_SUBCATEGORY, RECORD_POST, iter_export
+        )
+
+        self._open()
+
+        # Архивный пользователь всегда получает ID 1
+        self._user_id(None)
+
+        # Посты с запущенной конвертацией, ожидающие записи (в исходном порядке)
+        pending: Deque[Tuple[Dict, str, asyncio.Future]] = deque()
+
+        category_id = None
+        subcategory_id = None
+        position = 0
+        progress = tqdm(desc="Экспорт топиков", unit="topic")
+
+        try:
+            for record_type, record in iter_export(json_file):
+                if record_type in (RECORD_CATEGORY, RECORD_SUBCATEGORY):
+                    position += 1
+                    parent_id = category_id if record_type == RECORD_SUBCATEGORY else None
+
+                    self._insert('categories', {
+                        'id': record['id'],
+                        'name': record['title'],
+                        'description': record.get('description') or None,
+                        'slug': slugify(record['title']),
+                        'parent_category_id': parent_id,
+                        'position': position,
+                        'original_url': record.get('url'),
+                    })
+
+                    if record_type == RECORD_CATEGORY:
+                        category_id = record['id']
+                        subcategory_id = None
+                    else:
+                        subcategory_id = record['id']
+
+                elif record_type == RECORD_POST and subcategory_id:
+                    pending.append((record, subcategory_id, self.content_pipeline.submit(record)))
+
+                    if len(pending) >= self.lookahead:
+                        await self._write_post(*pending.popleft())
+                        progress.update(1)
+
+            while pending:
+                await self._write_post(*pending.popleft())
+                progress.update(1)
+
+            self.conn.commit()
+        finally:
+            progress.close()
+            for _, _, converted in pending:
+                converted.cancel()
+
+        logger.info(f"Промежуточная база для bulk импорта: {self.output_path}")
+        logger.info(f"Статистика: {self.stats}")
+
+        return self.output_path
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Конвертация HTML → Markdown в пуле процессов перед отправкой в Discourse
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+
+def convert_html_batch(htmls: List[str]) -> List[str]:
+    """
+    Конвертация HTML поста и его комментариев (выполняется в отдельном процессе)
+
+    Args:
+        htmls: HTML строки
+
+    Returns:
+        Markdown строки в том же порядке
+    """
+    from parser.utils import html_to_markdown
+
+    return [html_to_markdown(html) for html in htmls]
+
+
+class ContentPipeline:
+    """
+    Предварительная конвертация содержимого постов
+
+    Конвертация запускается при постановке поста в очередь импорта,
+    поэтому выполняется заранее, пока обработчики заняты API запросами
+    к предыдущим постам, и не блокирует event loop. Результаты
+    сохраняются в персистентном кэше (запросы к SQLite - в потоке,
+    вне event loop), поэтому повторные запуски не конвертируют
+    неизмененный HTML.
+    """
+
+    def __init__(self, config: Dict):
+        """
+        Инициализация
+
+        Args:
+            config: Конфигурация из discourse_config.yaml
+        """
+        content_config = config['content']
+        self.enabled = content_config['convert_to_markdown']
+
+        self._pool = (
+            ProcessPoolExecutor(max_workers=content_config.get('conversion_workers'))
+            if self.enabled else None
+        )
+
+        self.cache = None
+        cache_config = content_config.get('conversion_cache', {})
+        if self.enabled and cache_config.get('enabled', True):
+            from parser.markdown_cache import MarkdownCache
+
+            self.cache = MarkdownCache(
+                cache_config.get('path', './data/markdown_cache.db'),
+                cache_config.get('max_size_mb', 512)
+            )
+
+        self.stats = {
+            'posts_converted': 0,
+            'conversion_errors': 0,
+        }
+
+    def shutdown(self):
+        """Остановить пул процессов (ожидающие конвертации отменяются) и закрыть кэш"""
+        if self._pool:
+            self._pool.shutdown(cancel_futures=True)
+
+        if self.cache:
+            self.cache.close()
+
+    def get_stats(self) -> Dict:
+        """Счетчики конвертации и кэша"""
+        stats = dict(self.stats)
+        if self.cache:
+            stats['cache'] = self.cache.summary()
+        return stats
+
+    @staticmethod
+    def _post_htmls(post: Dict) -> List[str]:
+        """HTML поста и комментариев: первым - содержимое поста"""
+        return [post.get('content', '')] + [
+            comment.get('content', '') for comment in post.get('comments', [])
+        ]
+
+    def submit(self, post: Dict) -> asyncio.Future:
+        """
+        Запустить конвертацию поста
+
+        Args:
+            post: Пост из экспорта
+
+        Returns:
+            Future со списком Markdown: [пост, комментарий 1, комментарий 2, ...]
+        """
+        loop = asyncio.get_running_loop()
+        htmls = self._post_htmls(post)
+
+        if not self.enabled:
+            future = loop.create_future()
+            future.set_result(htmls)
+            return future
+
+        future = asyncio.ensure_future(self._convert(htmls))
+        future.add_done_callback(self._count)
+        return future
+
+    async def _convert(self, htmls: List[str]) -> List[str]:
+        """Конвертация с учетом кэша: в пул отправляется только отсутствующий HTML"""
+        markdowns: List[Optional[str]] = (
+            await asyncio.to_thread(self.cache.get_many, htmls)
+            if self.cache else [None] * len(htmls)
+        )
+        missing = [index for index, markdown in enumerate(markdowns) if markdown is None]
+
+        if missing:
+            loop = asyncio.get_running_loop()
+            converted = await loop.run_in_executor(
+                self._pool,
+                convert_html_batch,
+                [htmls[index] for index in missing]
+            )
+
+            for index, markdown in zip(missing, converted):
+                markdowns[index] = markdown
+
+            if self.cache:
+                await asyncio.to_thread(
+                    self.cache.put_many, [htmls[index] for index in missing], converted
+                )
+
+        return markdowns
+
+    def _count(self, future: asyncio.Future):
+        """Учет завершенной конвертации"""
+        if future.cancelled():
+            return
+
+        if future.exception():
+            self.stats['conversion_errors'] += 1
+            logger.error(f"Ошибка конвертации HTML: {future.exception()!r}")
+        else:
+            self.stats['posts_converted'] += 1
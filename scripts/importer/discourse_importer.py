@@ -4,28 +4,60 @@
 """
 
 import asyncio
+import hashlib
 import json
+import time
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
+from urllib.parse import urlparse
 
 import httpx
 import yaml
 from loguru import logger
 from tqdm import tqdm
 
+from parser.attachment_store import sha256_file
+
+from .content_pipeline import ContentPipeline
+from .id_mapping import IdMappingStore
+from .image_optimizer import ImageOptimizer
+from .user_provisioner import UserProvisioner
+
+
+# Расширения, которые встраиваются в пост как изображения
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp'}
+
+# Ошибки до отправки запроса: повтор безопасен и для POST
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+# POST, повтор которых не создает дублей: Discourse возвращает уже
+# существующую загрузку с тем же содержимым
+IDEMPOTENT_POST_ENDPOINTS = ('/uploads.json',)
+
+# Ответы, после которых запрос не выполнен (лимит, обслуживание или
+# перегрузка): повтор безопасен и для POST
+RETRYABLE_POST_STATUSES = (429, 503)
+
 
 class DiscourseImporter:
     """Класс для импорта данных в Discourse"""
     
-    def __init__(self, config_path: str = "config/discourse_config.yaml"):
+    def __init__(
+        self,
+        config_path: str = "config/discourse_config.yaml",
+        config: Optional[Dict] = None
+    ):
         """
         Инициализация импортера
         
         Args:
             config_path: Путь к конфигурационному файлу
+            config: Готовая конфигурация (вместо чтения config_path),
+                используется при замерах производительности
         """
-        self.config = self._load_config(config_path)
+        self.config = config if config is not None else self._load_config(config_path)
         
         self.base_url = self.config['discourse_url'].rstrip('/')
         self.api_key = self.config['api']['key']
@@ -39,14 +71,60 @@ class DiscourseImporter:
             'topics_created': 0,
             'posts_created': 0,
             'attachments_uploaded': 0,
-            'errors': 0
+            'attachments_deduplicated': 0,
+            'errors': 0,
+            'skipped_imported': 0,
+            'categories_existing': 0,
+            'topics_existing': 0,
+            'retries': 0,
+            'throttled_requests': 0,
+            'throttle_wait_seconds': 0.0
         }
         
+        # Общая пауза для всех запросов после 429/5xx (time.monotonic)
+        # и момент, до которого она уже учтена в throttle_wait_seconds
+        self._backoff_until = 0.0
+        self._backoff_counted_until = 0.0
+        
         # Мапинг старых ID к новым
         self.category_mapping = {}
         self.user_mapping = {}
         
+        # Персистентный маппинг для возобновления прерванного импорта
+        self.id_mapping = IdMappingStore(
+            self.config['import'].get('mapping_db', './data/import_mapping.db')
+        )
+        self._mapping_source: Optional[str] = None
+        
+        # Существующие в Discourse категории и топики (заполняется prefetch_existing)
+        self.existing_categories_by_slug: Dict[tuple, int] = {}
+        self.existing_categories_by_name: Dict[tuple, int] = {}
+        self.existing_topics: Dict[tuple, int] = {}
+        
+        # Очередь параллельного импорта топиков
+        self._topic_queue: Optional[asyncio.Queue] = None
+        self._topic_progress: Optional[tqdm] = None
+        
         self._setup_logging()
+        
+        # Загрузки вложений: ограничение параллельности и блокировки по хэшу,
+        # чтобы одинаковый файл не загружался одновременно дважды
+        self._upload_semaphore = asyncio.Semaphore(
+            self.config['attachments'].get('upload_concurrency', 4)
+        )
+        self._upload_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Пользователи Discourse для авторов (users.strategy)
+        self.user_provisioner = UserProvisioner(self.config, self._api_request, self.id_mapping)
+        
+        # Конвертация HTML → Markdown в пуле процессов
+        self.content_pipeline = ContentPipeline(self.config)
+        
+        # Пережатие изображений перед загрузкой (опционально)
+        image_config = self.config['attachments'].get('image_optimization', {})
+        self.image_optimizer: Optional[ImageOptimizer] = (
+            ImageOptimizer(image_config) if image_config.get('enabled') else None
+        )
     
     def _load_config(self, config_path: str) -> Dict:
         """Загрузка конфигурации"""
@@ -70,10 +148,10 @@ class DiscourseImporter:
     
     async def __aenter__(self):
         """Async context manager entry"""
+        # Content-Type выставляет httpx: JSON для json=, multipart для files=
         headers = {
             'Api-Key': self.api_key,
-            'Api-Username': self.api_username,
-            'Content-Type': 'application/json'
+            'Api-Username': self.api_username
         }
         
         self.client = httpx.AsyncClient(
@@ -88,44 +166,172 @@ class DiscourseImporter:
         """Async context manager exit"""
         if self.client:
             await self.client.aclose()
+        
+        if self.image_optimizer:
+            self.image_optimizer.shutdown()
+        
+        self.content_pipeline.shutdown()
+        self.id_mapping.close()
+    
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        """
+        Время ожидания из ответа 429/503
+        
+        Учитывает заголовок Retry-After (секунды или HTTP дата) и
+        extras.wait_seconds из JSON ответа Discourse о превышении лимита.
+        
+        Args:
+            response: Ответ сервера
+            
+        Returns:
+            Задержка в секундах или None
+        """
+        retry_after = response.headers.get('Retry-After')
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                try:
+                    retry_date = parsedate_to_datetime(retry_after)
+                    return max(0.0, retry_date.timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        
+        try:
+            wait_seconds = response.json().get('extras', {}).get('wait_seconds')
+        except (ValueError, AttributeError):
+            wait_seconds = None
+        
+        return float(wait_seconds) if wait_seconds is not None else None
+    
+    async def _wait_for_backoff(self):
+        """
+        Дождаться окончания общей паузы после 429/5xx
+        
+        throttle_wait_seconds - время, в течение которого действовала пауза:
+        параллельные запросы ждут одну и ту же паузу, и она учитывается один раз.
+        """
+        now = time.monotonic()
+        delay = self._backoff_until - now
+        if delay > 0:
+            counted_from = max(now, self._backoff_counted_until)
+            self.stats['throttle_wait_seconds'] += max(0.0, self._backoff_until - counted_from)
+            self._backoff_counted_until = self._backoff_until
+            await asyncio.sleep(delay)
     
     async def _api_request(
         self,
         method: str,
         endpoint: str,
+        upload: Optional[tuple] = None,
+        allow_not_found: bool = False,
         **kwargs
     ) -> Optional[Dict]:
         """
         Выполнение API запроса к Discourse
         
+        Ответы 429 и 5xx, а также сетевые ошибки повторяются до
+        error_handling.max_retries раз. Пауза после 429/5xx (Retry-After
+        или экспоненциальная от retry_delay) общая для всех параллельных
+        запросов, чтобы не усугублять превышение лимита.
+        
+        POST (создание топиков, постов, категорий) повторяется только
+        после 429, 503 и ошибок установки соединения: после других 5xx
+        или обрыва отправленного запроса объект мог быть уже создан, и
+        повтор создал бы дубль. Загрузка файлов (/uploads.json) не создает
+        дублей и повторяется как GET.
+        
         Args:
             method: HTTP метод (GET, POST, PUT, DELETE)
             endpoint: API endpoint
+            upload: (имя файла, путь) для multipart загрузки; файл
+                открывается заново на каждую попытку и передается потоком
+            allow_not_found: Ответ 404 - ожидаемый результат (не ошибка)
             **kwargs: Дополнительные параметры для httpx
             
         Returns:
             JSON ответ или None при ошибке
         """
-        try:
-            response = await self.client.request(method, endpoint, **kwargs)
-            response.raise_for_status()
+        error_config = self.config.get('error_handling', {})
+        max_retries = error_config.get('max_retries', 3)
+        retry_delay = error_config.get('retry_delay', 5)
+        idempotent = method.upper() != 'POST' or endpoint in IDEMPOTENT_POST_ENDPOINTS
+        
+        for attempt in range(max_retries + 1):
+            await self._wait_for_backoff()
             
-            if response.status_code == 204:  # No Content
-                return {}
+            try:
+                if upload:
+                    upload_name, file_path = upload
+                    with open(file_path, 'rb') as f:
+                        response = await self.client.request(
+                            method, endpoint, files={'file': (upload_name, f)}, **kwargs
+                        )
+                else:
+                    response = await self.client.request(method, endpoint, **kwargs)
+                
+            except httpx.TransportError as e:
+                if attempt < max_retries and (idempotent or isinstance(e, CONNECT_ERRORS)):
+                    delay = retry_delay * (2 ** attempt)
+                    logger.warning(
+                        f"Сетевая ошибка при запросе {endpoint}: {e!r}, повтор через {delay} с"
+                    )
+                    self.stats['retries'] += 1
+                    await asyncio.sleep(delay)
+                    continue
+                
+                logger.error(f"Ошибка при запросе {endpoint}: {e!r}")
+                self.stats['errors'] += 1
+                return None
+                
+            except Exception as e:
+                logger.exception(f"Ошибка при запросе {endpoint}: {e}")
+                self.stats['errors'] += 1
+                return None
             
-            return response.json()
+            status = response.status_code
             
-        except httpx.HTTPStatusError as e:
-            logger.error(
-                f"HTTP ошибка {e.response.status_code} при запросе {endpoint}: {e.response.text}"
-            )
-            self.stats['errors'] += 1
-            return None
+            if status in RETRYABLE_POST_STATUSES or (status >= 500 and idempotent):
+                if status == 429:
+                    self.stats['throttled_requests'] += 1
+                
+                if attempt < max_retries:
+                    delay = self._retry_after(response)
+                    if delay is None:
+                        delay = retry_delay * (2 ** attempt)
+                    
+                    self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+                    logger.warning(
+                        f"HTTP {status} при запросе {endpoint}, "
+                        f"пауза {delay:.1f} с (попытка {attempt + 1}/{max_retries})"
+                    )
+                    self.stats['retries'] += 1
+                    continue
             
-        except Exception as e:
-            logger.exception(f"Ошибка при запросе {endpoint}: {e}")
-            self.stats['errors'] += 1
-            return None
+            if status == 404 and allow_not_found:
+                return None
+            
+            # Не 2xx (в том числе неотработанный редирект) - ошибка
+            if not response.is_success:
+                logger.error(
+                    f"HTTP ошибка {status} при запросе {endpoint}: {response.text}"
+                )
+                self.stats['errors'] += 1
+                return None
+            
+            if status == 204:  # No Content
+                return {}
+            
+            try:
+                return response.json()
+            except ValueError as e:
+                # Например, страница обслуживания от прокси вместо JSON
+                logger.error(f"Ответ на запрос {endpoint} (HTTP {status}) не JSON: {e}")
+                self.stats['errors'] += 1
+                return None
+        
+        return None
     
     async def create_category(
         self,
@@ -146,8 +352,15 @@ class DiscourseImporter:
             color: Цвет в hex формате
             
         Returns:
-            ID созданной категории или None
+            ID созданной (или уже существующей) категории или None
         """
+        if self.config['import'].get('skip_existing_categories'):
+            existing_id = self.find_existing_category(name, slug, parent_category_id)
+            if existing_id:
+                logger.info(f"Категория уже существует: {name} (ID: {existing_id})")
+                self.stats['categories_existing'] += 1
+                return existing_id
+        
         if self.config['import']['dry_run']:
             logger.info(f"[DRY RUN] Создание категории: {name}")
             return 999  # Fake ID for dry run
@@ -185,7 +398,8 @@ class DiscourseImporter:
         raw: str,
         category_id: int,
         created_at: Optional[datetime] = None,
-        tags: List[str] = None
+        tags: List[str] = None,
+        username: Optional[str] = None
     ) -> Optional[int]:
         """
         Создание топика в Discourse
@@ -196,6 +410,7 @@ class DiscourseImporter:
             category_id: ID категории
             created_at: Дата создания (для backdating)
             tags: Список тегов
+            username: Автор (по умолчанию - api.username)
             
         Returns:
             ID созданного топика или None
@@ -219,7 +434,8 @@ class DiscourseImporter:
         result = await self._api_request(
             'POST',
             '/posts.json',
-            json=payload
+            json=payload,
+            headers=self._as_user(username)
         )
         
         if result and 'topic_id' in result:
@@ -234,7 +450,8 @@ class DiscourseImporter:
         self,
         topic_id: int,
         raw: str,
-        created_at: Optional[datetime] = None
+        created_at: Optional[datetime] = None,
+        username: Optional[str] = None
     ) -> Optional[int]:
         """
         Создание поста (комментария) в топике
@@ -243,6 +460,7 @@ class DiscourseImporter:
             topic_id: ID топика
             raw: Содержимое (Markdown)
             created_at: Дата создания
+            username: Автор (по умолчанию - api.username)
             
         Returns:
             ID созданного поста или None
@@ -262,7 +480,8 @@ class DiscourseImporter:
         result = await self._api_request(
             'POST',
             '/posts.json',
-            json=payload
+            json=payload,
+            headers=self._as_user(username)
         )
         
         if result and 'id' in result:
@@ -272,10 +491,17 @@ class DiscourseImporter:
         
         return None
     
+    def _as_user(self, username: Optional[str]) -> Dict:
+        """Заголовки запроса от имени пользователя (общий клиент и пул соединений)"""
+        if not username or username == self.api_username:
+            return {}
+        return {'Api-Username': username}
+    
     async def upload_attachment(
         self,
         file_path: str,
-        topic_id: Optional[int] = None
+        topic_id: Optional[int] = None,
+        upload_name: Optional[str] = None
     ) -> Optional[str]:
         """
         Загрузка вложения в Discourse
@@ -283,20 +509,93 @@ class DiscourseImporter:
         Args:
             file_path: Путь к файлу
             topic_id: ID топика (опционально)
+            upload_name: Имя файла в Discourse (по умолчанию - имя file_path)
             
         Returns:
             URL загруженного файла или None
         """
+        upload = await self._upload(file_path, topic_id, upload_name)
+        return upload['url'] if upload else None
+    
+    async def _upload(
+        self,
+        file_path: str,
+        topic_id: Optional[int] = None,
+        upload_name: Optional[str] = None,
+        sha256: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Загрузка файла с дедупликацией по содержимому
+        
+        Файл с уже загруженным содержимым (по SHA-256) повторно не
+        загружается: URL берется из маппинга ID.
+        
+        Args:
+            file_path: Путь к файлу
+            topic_id: ID топика (опционально)
+            upload_name: Имя файла в Discourse (по умолчанию - имя file_path;
+                файлы в хранилище вложений названы по хэшу)
+            sha256: SHA-256 содержимого из экспорта (если нет - вычисляется)
+            
+        Returns:
+            Данные загрузки (url, short_url, original_filename, extension,
+            width, height) или None
+        """
         if self.config['import']['dry_run']:
             logger.debug(f"[DRY RUN] Загрузка файла: {file_path}")
-            return "http://example.com/fake-upload.pdf"
+            return {
+                'url': "http://example.com/fake-upload.pdf",
+                'short_url': None,
+                'original_filename': upload_name or Path(file_path).name,
+            }
         
-        try:
-            file_path = Path(file_path)
+        file_path = Path(file_path)
+        
+        if not file_path.exists():
+            logger.error(f"Файл не найден: {file_path}")
+            return None
+        
+        content_hash = sha256 or await asyncio.to_thread(sha256_file, file_path)
+        lock = self._upload_locks.setdefault(content_hash, asyncio.Lock())
+        
+        async with lock:
+            upload_url = self.id_mapping.get(IdMappingStore.KIND_UPLOAD, content_hash)
+            if upload_url:
+                self.stats['attachments_deduplicated'] += 1
+                upload = self.id_mapping.get_data(IdMappingStore.KIND_UPLOAD, content_hash) or {}
+                return {**upload, 'url': upload_url}
             
-            if not file_path.exists():
-                logger.error(f"Файл не найден: {file_path}")
-                return None
+            async with self._upload_semaphore:
+                upload = await self._upload_file(file_path, topic_id, upload_name, content_hash)
+            
+            if upload:
+                self.id_mapping.set(
+                    IdMappingStore.KIND_UPLOAD,
+                    content_hash,
+                    upload['url'],
+                    data={key: value for key, value in upload.items() if key != 'url'}
+                )
+        
+        return upload
+    
+    async def _upload_file(
+        self,
+        file_path: Path,
+        topic_id: Optional[int] = None,
+        upload_name: Optional[str] = None,
+        content_hash: Optional[str] = None
+    ) -> Optional[Dict]:
+        """Пережатие (опционально), проверка размера и загрузка файла"""
+        # Исходное имя; без расширения Discourse не пропустит файл,
+        # поэтому оно берется у файла в хранилище (проверено по содержимому)
+        upload_name = upload_name or file_path.name
+        if not Path(upload_name).suffix:
+            upload_name += file_path.suffix
+        
+        try:
+            # Пережать изображение (результат кэшируется по хэшу исходника)
+            if self.image_optimizer:
+                file_path = Path(await self.image_optimizer.optimize(str(file_path), content_hash))
             
             # Проверка размера файла
             size_mb = file_path.stat().st_size / (1024 * 1024)
@@ -306,64 +605,294 @@ class DiscourseImporter:
                 logger.warning(f"Файл слишком большой ({size_mb:.1f} MB): {file_path}")
                 return None
             
-            # Подготовка данных для загрузки
-            files = {
-                'file': (file_path.name, open(file_path, 'rb'))
-            }
+        except Exception as e:
+            logger.exception(f"Ошибка при подготовке файла {file_path}: {e}")
+            self.stats['errors'] += 1
+            return None
+        
+        params = {'type': 'composer'}
+        if topic_id:
+            params['topic_id'] = topic_id
+        
+        result = await self._api_request(
+            'POST',
+            '/uploads.json',
+            upload=(upload_name, file_path),
+            params=params
+        )
+        
+        if not result or 'url' not in result:
+            return None
+        
+        logger.debug(f"Загружен файл: {upload_name} → {result['url']}")
+        self.stats['attachments_uploaded'] += 1
+        
+        return {
+            'url': result['url'],
+            'short_url': result.get('short_url'),
+            'original_filename': result.get('original_filename', upload_name),
+            'extension': result.get('extension'),
+            'width': result.get('width'),
+            'height': result.get('height'),
+        }
+    
+    @staticmethod
+    def _normalize_title(title: str) -> str:
+        """Нормализация заголовка для сравнения"""
+        return ' '.join(title.split()).lower()
+    
+    async def prefetch_existing(self):
+        """
+        Загрузка существующих категорий и заголовков топиков
+        
+        Категории (с подкатегориями) берутся из /site.json, топики -
+        постранично из списка каждой категории. Индексы в памяти позволяют
+        не отправлять заведомо повторные запросы на создание.
+        """
+        import_config = self.config['import']
+        skip_categories = import_config.get('skip_existing_categories')
+        skip_topics = import_config.get('skip_existing_topics')
+        
+        if not skip_categories and not skip_topics:
+            return
+        
+        site = await self._api_request('GET', '/site.json')
+        if not site:
+            logger.warning("Не удалось получить список категорий Discourse")
+            return
+        
+        categories = site.get('categories', [])
+        
+        for category in categories:
+            parent_id = category.get('parent_category_id')
+            self.existing_categories_by_slug[(parent_id, category['slug'])] = category['id']
+            self.existing_categories_by_name[(parent_id, category['name'].lower())] = category['id']
+        
+        logger.info(f"Существующих категорий в Discourse: {len(categories)}")
+        
+        if not skip_topics:
+            return
+        
+        # Топики категорий загружаются параллельно (не больше concurrency запросов)
+        semaphore = asyncio.Semaphore(import_config.get('concurrency', 4))
+        categories_by_id = {category['id']: category for category in categories}
+        
+        async def fetch(category: Dict):
+            async with semaphore:
+                await self._prefetch_category_topics(
+                    category['id'],
+                    self._category_slug_path(category, categories_by_id)
+                )
+        
+        await asyncio.gather(*(fetch(category) for category in categories))
+        
+        logger.info(f"Существующих топиков в Discourse: {len(self.existing_topics)}")
+    
+    @staticmethod
+    def _category_slug_path(category: Dict, categories_by_id: Dict[int, Dict]) -> str:
+        """Путь категории из slug родителей и ее slug (parent/child)"""
+        slugs = [category['slug']]
+        parent = categories_by_id.get(category.get('parent_category_id'))
+        
+        while parent and len(slugs) < len(categories_by_id):
+            slugs.insert(0, parent['slug'])
+            parent = categories_by_id.get(parent.get('parent_category_id'))
+        
+        return '/'.join(slugs)
+    
+    async def _prefetch_category_topics(self, category_id: int, slug_path: str):
+        """
+        Заголовки всех топиков категории
+        
+        Discourse отвечает на /c/{id}.json редиректом 301 на канонический
+        /c/{slug}/{id}.json, поэтому запрашивается сразу канонический путь
+        (редиректы на случай переименования категории тоже обрабатываются).
+        
+        Args:
+            category_id: ID категории
+            slug_path: Путь из slug (см. _category_slug_path)
+        """
+        page = 0
+        
+        while True:
+            result = await self._api_request(
+                'GET',
+                f'/c/{slug_path}/{category_id}.json',
+                params={'page': page},
+                follow_redirects=True
+            )
             
-            params = {'type': 'composer'}
-            if topic_id:
-                params['topic_id'] = topic_id
+            if not result:
+                return
             
-            # Убрать Content-Type заголовок для multipart/form-data
-            headers = dict(self.client.headers)
-            headers.pop('Content-Type', None)
+            topic_list = result.get('topic_list', {})
+            topics = topic_list.get('topics', [])
             
-            response = await self.client.post(
-                '/uploads.json',
-                files=files,
-                params=params,
-                headers=headers
-            )
+            for topic in topics:
+                key = (topic.get('category_id', category_id), self._normalize_title(topic['title']))
+                self.existing_topics.setdefault(key, topic['id'])
+            
+            if not topics or not topic_list.get('more_topics_url'):
+                return
             
-            response.raise_for_status()
-            result = response.json()
+            page += 1
+    
+    def find_existing_category(
+        self,
+        name: str,
+        slug: str,
+        parent_category_id: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        ID существующей категории по slug или названию
+        
+        Args:
+            name: Название категории
+            slug: URL slug
+            parent_category_id: ID родительской категории
             
-            if 'url' in result:
-                upload_url = result['url']
-                logger.debug(f"Загружен файл: {file_path.name} → {upload_url}")
-                self.stats['attachments_uploaded'] += 1
-                return upload_url
+        Returns:
+            ID категории или None
+        """
+        return (
+            self.existing_categories_by_slug.get((parent_category_id, slug))
+            or self.existing_categories_by_name.get((parent_category_id, name.lower()))
+        )
+    
+    def find_existing_topic(self, title: str, category_id: int) -> Optional[int]:
+        """
+        ID существующего топика с таким заголовком в категории
+        
+        Args:
+            title: Заголовок топика
+            category_id: ID категории
             
-        except Exception as e:
-            logger.exception(f"Ошибка при загрузке файла {file_path}: {e}")
-            self.stats['errors'] += 1
+        Returns:
+            ID топика или None
+        """
+        return self.existing_topics.get((category_id, self._normalize_title(title)))
+    
+    @staticmethod
+    def _mapping_key(record: Dict) -> Optional[str]:
+        """
+        Ключ категории, подкатегории или поста в маппинге ID
         
-        return None
+        ID в экспорте позиционные (cat_1, ..._post_3) и меняются при повторном
+        обходе, поэтому ключом служит URL объекта на WIX (ID - для экспорта без URL).
+        """
+        return record.get('url') or record.get('id')
+    
+    def _comment_keys(self, post: Dict) -> List[str]:
+        """
+        Ключи комментариев поста в маппинге ID
+        
+        У комментариев нет URL, а дата в экспорте бывает относительной
+        ("2 hours ago"), поэтому ключ - хэш автора и текста внутри поста;
+        одинаковые комментарии различаются порядковым номером.
+        """
+        post_key = self._mapping_key(post)
+        occurrences: Dict[str, int] = {}
+        keys = []
+        
+        for comment in post.get('comments', []):
+            identity = f"{comment.get('author') or ''}\0{comment.get('content') or ''}"
+            digest = hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+            occurrences[digest] = occurrences.get(digest, 0) + 1
+            keys.append(f"{post_key}#comment-{digest}-{occurrences[digest]}")
+        
+        return keys
+    
+    def _bind_mapping_source(self, record: Dict):
+        """Привязка базы маппинга к сайту экспорта по URL первой записи"""
+        if self._mapping_source or not record.get('url'):
+            return
+        
+        parsed = urlparse(record['url'])
+        self._mapping_source = f"{parsed.scheme}://{parsed.netloc}"
+        self.id_mapping.bind_source(self._mapping_source)
+    
+    def _remember(self, kind: str, wix_id: Optional[str], discourse_id):
+        """Сохранить соответствие ID (кроме тестового режима)"""
+        if wix_id is None or self.config['import']['dry_run']:
+            return
+        
+        self.id_mapping.set(kind, wix_id, discourse_id)
     
     async def import_from_json(self, json_file: str):
         """
         Импорт данных из JSON файла
         
+        Экспорт читается потоково (категория → подкатегории → посты),
+        поэтому память не зависит от размера файла, а импорт топиков
+        начинается сразу.
+        
         Args:
-            json_file: Путь к JSON файлу с экспортированными данными
+            json_file: Путь к JSON (или JSONL) файлу с экспортированными данными
         """
+        from parser.export_reader import (
+            RECORD_CATEGORY, RECORD_SUBCATEGORY, RECORD_POST, iter_export
+        )
+        
         logger.info("=" * 80)
         logger.info("НАЧАЛО ИМПОРТА В DISCOURSE")
         logger.info("=" * 80)
         
-        # Загрузить данные
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        # Существующие категории и топики (для skip_existing_*)
+        await self.prefetch_existing()
+        
+        # Пользователи авторов готовятся по мере импорта (username_for)
+        await self.user_provisioner.prepare()
+        self.user_mapping = self.user_provisioner.usernames
         
-        categories = data.get('categories', [])
+        # Топики импортируются параллельно пулом обработчиков;
+        # категории создаются последовательно, т.к. нужны их ID.
+        # Размер очереди - сколько постов конвертируется заранее
+        concurrency = self.config['import'].get('concurrency', 4)
+        lookahead = self.config['import'].get('conversion_lookahead', concurrency * 4)
+        self._topic_queue = asyncio.Queue(maxsize=max(lookahead, 1))
+        self._topic_progress = tqdm(desc="Импорт топиков", unit="topic")
+        workers = [
+            asyncio.create_task(self._topic_worker())
+            for _ in range(concurrency)
+        ]
         
-        # Импорт категорий
-        for category in tqdm(categories, desc="Импорт категорий"):
-            await self._import_category(category)
+        category_id = None
+        subcat_id = None
+        categories_progress = tqdm(desc="Импорт категорий", unit="cat")
+        
+        try:
+            for record_type, record in iter_export(json_file):
+                self._bind_mapping_source(record)
+                
+                if record_type == RECORD_CATEGORY:
+                    category_id = await self._import_category(record)
+                    subcat_id = None
+                    categories_progress.update(1)
+                    
+                    # Задержка между запросами
+                    await asyncio.sleep(self.config['import']['delay_between_requests'])
+                
+                elif record_type == RECORD_SUBCATEGORY:
+                    subcat_id = None
+                    if category_id:
+                        subcat_id = await self._import_subcategory(record, category_id)
+                
+                elif record_type == RECORD_POST and subcat_id:
+                    # Конвертация начинается сразу, а импорт - когда освободится
+                    # обработчик; очередь ограничена, чтение файла ждет обработчиков
+                    converted = None if self._is_post_imported(record) else (
+                        self.content_pipeline.submit(record)
+                    )
+                    await self._topic_queue.put((record, subcat_id, converted))
             
-            # Задержка между запросами
-            await asyncio.sleep(self.config['import']['delay_between_requests'])
+            # Дождаться импорта всех топиков
+            await self._topic_queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._topic_progress.close()
+            categories_progress.close()
         
         # Сохранение статистики
         self.save_stats()
@@ -371,57 +900,262 @@ class DiscourseImporter:
         logger.info("=" * 80)
         logger.info("ИМПОРТ ЗАВЕРШЕН")
         logger.info(f"Статистика: {self.stats}")
+        if self.image_optimizer:
+            logger.info(
+                f"Пережатие изображений: {self.image_optimizer.stats['images_optimized']} файлов, "
+                f"сэкономлено {self.image_optimizer.stats['bytes_saved'] / (1024 * 1024):.1f} MB"
+            )
         logger.info("=" * 80)
     
-    async def _import_category(self, category: Dict):
-        """Импорт одной категории со всем содержимым"""
+    async def _import_category(self, category: Dict) -> Optional[int]:
+        """
+        Импорт одной категории (без подкатегорий)
+        
+        Returns:
+            ID категории в Discourse или None
+        """
         from slugify import slugify
         
-        # Создать категорию
-        category_id = await self.create_category(
-            name=category['title'],
-            slug=slugify(category['title']),
-            description=category.get('description', '')
-        )
+        # Создать категорию (если не создана при предыдущем запуске)
+        category_key = self._mapping_key(category)
+        category_id = self.id_mapping.get(IdMappingStore.KIND_CATEGORY, category_key)
         
-        if not category_id:
-            logger.error(f"Не удалось создать категорию: {category['title']}")
-            return
+        if category_id:
+            self.stats['skipped_imported'] += 1
+        else:
+            category_id = await self.create_category(
+                name=category['title'],
+                slug=slugify(category['title']),
+                description=category.get('description', '')
+            )
+            
+            if not category_id:
+                logger.error(f"Не удалось создать категорию: {category['title']}")
+                return None
+            
+            self._remember(IdMappingStore.KIND_CATEGORY, category_key, category_id)
         
         # Сохранить маппинг
         self.category_mapping[category.get('id')] = category_id
         
-        # Импорт подкатегорий
-        for subcategory in category.get('subcategories', []):
-            await self._import_subcategory(subcategory, category_id)
+        return category_id
     
-    async def _import_subcategory(self, subcategory: Dict, parent_id: int):
-        """Импорт подкатегории"""
+    async def _import_subcategory(self, subcategory: Dict, parent_id: int) -> Optional[int]:
+        """
+        Импорт подкатегории (без постов)
+        
+        Returns:
+            ID подкатегории в Discourse или None
+        """
         from slugify import slugify
         
-        # Создать подкатегорию
-        subcat_id = await self.create_category(
-            name=subcategory['title'],
-            slug=slugify(subcategory['title']),
-            parent_category_id=parent_id
-        )
+        # Создать подкатегорию (если не создана при предыдущем запуске)
+        subcategory_key = self._mapping_key(subcategory)
+        subcat_id = self.id_mapping.get(IdMappingStore.KIND_SUBCATEGORY, subcategory_key)
         
-        if not subcat_id:
-            return
+        if subcat_id:
+            self.stats['skipped_imported'] += 1
+        else:
+            subcat_id = await self.create_category(
+                name=subcategory['title'],
+                slug=slugify(subcategory['title']),
+                parent_category_id=parent_id
+            )
+            
+            if not subcat_id:
+                return None
+            
+            self._remember(IdMappingStore.KIND_SUBCATEGORY, subcategory_key, subcat_id)
         
-        # Импорт постов
-        for post in subcategory.get('posts', []):
-            await self._import_post(post, subcat_id)
+        return subcat_id
+    
+    async def _topic_worker(self):
+        """
+        Обработчик очереди топиков
+        
+        Каждый топик со всеми комментариями импортируется одним обработчиком,
+        поэтому порядок комментариев внутри топика сохраняется. Счетчики
+        stats изменяются без await между чтением и записью, поэтому
+        одновременная работа обработчиков в одном event loop безопасна.
+        """
+        while True:
+            post, category_id, converted = await self._topic_queue.get()
+            
+            try:
+                markdown = await converted if converted else None
+                await self._import_post(post, category_id, markdown)
+            except Exception as e:
+                logger.exception(f"Ошибка при импорте поста {post.get('title')}: {e}")
+                self.stats['errors'] += 1
+            finally:
+                self._topic_queue.task_done()
+                self._topic_progress.update(1)
+            
             await asyncio.sleep(self.config['import']['delay_between_requests'])
     
-    async def _import_post(self, post: Dict, category_id: int):
-        """Импорт поста"""
-        from ..parser.utils import html_to_markdown
+    def _is_post_imported(self, post: Dict) -> bool:
+        """Топик и все комментарии поста уже импортированы (по маппингу ID)"""
+        return bool(self.id_mapping.get(IdMappingStore.KIND_TOPIC, self._mapping_key(post))) and all(
+            self.id_mapping.get(IdMappingStore.KIND_POST, comment_key)
+            for comment_key in self._comment_keys(post)
+        )
+    
+    async def _import_post(
+        self,
+        post: Dict,
+        category_id: int,
+        markdown: Optional[List[str]] = None
+    ):
+        """
+        Импорт поста
+        
+        Уже импортированные топик (с вложениями) и комментарии (по маппингу ID)
+        пропускаются, поэтому частично импортированный пост дополняется.
+        
+        Args:
+            post: Пост из экспорта
+            category_id: ID категории в Discourse
+            markdown: Сконвертированное содержимое (см. ContentPipeline.submit);
+                если не передано, конвертируется при необходимости
+        """
+        post_key = self._mapping_key(post)
+        topic_id = self.id_mapping.get(IdMappingStore.KIND_TOPIC, post_key)
+        
+        if topic_id:
+            self.stats['skipped_imported'] += 1
+        else:
+            # Топик, уже существующий на форуме, не дополняется
+            if self.config['import'].get('skip_existing_topics'):
+                existing_id = self.find_existing_topic(post['title'], category_id)
+                if existing_id:
+                    logger.info(f"Топик уже существует: {post['title']} (ID: {existing_id})")
+                    self.stats['topics_existing'] += 1
+                    self._remember(IdMappingStore.KIND_TOPIC, post_key, existing_id)
+                    return
+            
+            if markdown is None:
+                markdown = await self.content_pipeline.submit(post)
+            
+            # Вложения загружаются до создания топика, чтобы ссылки на них
+            # вошли в текст и топик создавался одним запросом
+            attachment_links = await self._upload_post_attachments(post)
+            
+            topic_id = await self._create_post_topic(
+                post, category_id, markdown[0], attachment_links
+            )
+            
+            if not topic_id:
+                return
+            
+            self._remember(IdMappingStore.KIND_TOPIC, post_key, topic_id)
+        
+        # Импорт комментариев
+        comments = zip(post.get('comments', []), self._comment_keys(post))
+        for index, (comment, comment_key) in enumerate(comments, 1):
+            if self.id_mapping.get(IdMappingStore.KIND_POST, comment_key):
+                continue
+            
+            if markdown is None:
+                markdown = await self.content_pipeline.submit(post)
+            
+            comment_created_at = None
+            if comment.get('created_at'):
+                comment_created_at = self._parse_date(comment['created_at'])
+            
+            post_id = await self.create_post(
+                topic_id,
+                markdown[index],
+                created_at=comment_created_at,
+                username=await self.user_provisioner.username_for(comment.get('author'))
+            )
+            
+            # Остановиться на первой ошибке, чтобы при повторном запуске
+            # комментарии добавились в исходном порядке
+            if not post_id:
+                logger.warning(f"Импорт комментариев топика {topic_id} прерван")
+                break
+            
+            self._remember(IdMappingStore.KIND_POST, comment_key, post_id)
+    
+    async def _upload_post_attachments(self, post: Dict) -> List[str]:
+        """
+        Параллельная загрузка вложений поста
+        
+        Args:
+            post: Пост из экспорта
+            
+        Returns:
+            Markdown ссылки на загруженные вложения в исходном порядке
+        """
+        if not self.config['attachments']['upload_attachments']:
+            return []
+        
+        attachments = [
+            attachment for attachment in post.get('attachments', [])
+            if attachment.get('local_path')
+        ]
+        
+        uploads = await asyncio.gather(*(
+            self._upload(
+                attachment['local_path'],
+                upload_name=attachment.get('filename'),
+                sha256=attachment.get('sha256')
+            )
+            for attachment in attachments
+        ))
+        
+        links = []
+        for attachment, upload in zip(attachments, uploads):
+            if not upload:
+                logger.warning(
+                    f"Вложение {attachment.get('filename')} поста {post.get('id')} не загружено"
+                )
+                continue
+            
+            links.append(self._attachment_markdown(
+                attachment.get('filename') or upload.get('original_filename', ''),
+                upload
+            ))
+        
+        return links
+    
+    @staticmethod
+    def _attachment_markdown(filename: str, upload: Dict) -> str:
+        """
+        Markdown ссылка на загрузку в формате редактора Discourse
         
-        # Конвертировать контент
-        content = post.get('content', '')
-        if self.config['content']['convert_to_markdown']:
-            content = html_to_markdown(content)
+        Изображения встраиваются (![имя|ШxВ](upload://...)),
+        остальные файлы - ссылкой-вложением ([имя|attachment](upload://...)).
+        
+        Args:
+            filename: Отображаемое имя файла
+            upload: Данные загрузки (см. _upload)
+            
+        Returns:
+            Markdown строка
+        """
+        url = upload.get('short_url') or upload['url']
+        name = filename.replace('[', '(').replace(']', ')').replace('|', ' ')
+        extension = (upload.get('extension') or Path(filename).suffix.lstrip('.')).lower()
+        
+        if extension in IMAGE_EXTENSIONS:
+            if upload.get('width') and upload.get('height'):
+                return f"![{name}|{upload['width']}x{upload['height']}]({url})"
+            return f"![{name}]({url})"
+        
+        return f"[{name}|attachment]({url})"
+    
+    async def _create_post_topic(
+        self,
+        post: Dict,
+        category_id: int,
+        content: str,
+        attachment_links: Optional[List[str]] = None
+    ) -> Optional[int]:
+        """Создание топика из поста со сконвертированным содержимым и вложениями"""
+        # Добавить ссылки на вложения
+        if attachment_links:
+            content = f"{content}\n\n" + "\n".join(attachment_links)
         
         # Добавить disclaimer если нужно
         if self.config['content']['add_disclaimer']:
@@ -433,38 +1167,24 @@ class DiscourseImporter:
         # Создать топик
         created_at = None
         if post.get('created_at'):
-            from dateutil import parser as date_parser
-            try:
-                created_at = date_parser.parse(post['created_at'])
-            except:
-                pass
+            created_at = self._parse_date(post['created_at'])
         
-        topic_id = await self.create_topic(
+        return await self.create_topic(
             title=post['title'],
             raw=content,
             category_id=category_id,
-            created_at=created_at
+            created_at=created_at,
+            username=await self.user_provisioner.username_for(post.get('author'))
         )
-        
-        if not topic_id:
-            return
-        
-        # Импорт вложений
-        if self.config['attachments']['upload_attachments']:
-            for attachment in post.get('attachments', []):
-                if attachment.get('local_path'):
-                    await self.upload_attachment(
-                        attachment['local_path'],
-                        topic_id
-                    )
-        
-        # Импорт комментариев
-        for comment in post.get('comments', []):
-            comment_content = comment.get('content', '')
-            if self.config['content']['convert_to_markdown']:
-                comment_content = html_to_markdown(comment_content)
-            
-            await self.create_post(topic_id, comment_content)
+    
+    @staticmethod
+    def _parse_date(value: str) -> Optional[datetime]:
+        """Разбор даты из экспорта"""
+        from dateutil import parser as date_parser
+        try:
+            return date_parser.parse(value)
+        except:
+            return None
     
     def save_stats(self):
         """Сохранение статистики импорта"""
@@ -480,6 +1200,12 @@ class DiscourseImporter:
             'statistics': self.stats
         }
         
+        stats_data['conversion'] = self.content_pipeline.get_stats()
+        stats_data['users'] = self.user_provisioner.stats
+        
+        if self.image_optimizer:
+            stats_data['image_optimization'] = self.image_optimizer.stats
+        
         with open(stats_file, 'w', encoding='utf-8') as f:
             json.dump(stats_data, f, ensure_ascii=False, indent=2)
         
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Персистентный маппинг ID WIX → Discourse (SQLite)
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mapping (
+    kind TEXT NOT NULL,
+    wix_id TEXT NOT NULL,
+    discourse_id,
+    data TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (kind, wix_id)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class IdMappingStore:
+    """
+    Соответствие объектов WIX созданным в Discourse
+
+    Запись фиксируется сразу после успешного API вызова, поэтому
+    прерванный импорт при повторном запуске продолжается с места
+    остановки без дублей. Все записи загружаются в память при открытии.
+
+    Ключи объектов форума - их URL на WIX (см. DiscourseImporter._mapping_key),
+    а база привязывается к сайту экспорта (bind_source).
+    """
+
+    KIND_CATEGORY = 'category'
+    KIND_SUBCATEGORY = 'subcategory'
+    KIND_TOPIC = 'post'
+    KIND_POST = 'comment'
+    # SHA-256 содержимого файла → URL загрузки (общий для всех топиков)
+    KIND_UPLOAD = 'upload'
+    # Имя автора WIX → username в Discourse
+    KIND_USER = 'user'
+    # username в нижнем регистре → username пользователя, созданного импортом
+    KIND_CREATED_USER = 'created_user'
+
+    def __init__(self, db_path: str):
+        """
+        Открытие хранилища
+
+        Args:
+            db_path: Путь к файлу SQLite
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.executescript(SCHEMA)
+
+        self._mapping: Dict[str, Dict[str, Any]] = {}
+        for kind, wix_id, discourse_id in self.conn.execute(
+            "SELECT kind, wix_id, discourse_id FROM mapping"
+        ):
+            self._mapping.setdefault(kind, {})[wix_id] = discourse_id
+
+        logger.info(
+            f"Маппинг ID: {self.db_path} "
+            f"({sum(len(ids) for ids in self._mapping.values())} записей)"
+        )
+
+    def close(self):
+        """Закрыть соединение с базой"""
+        self.conn.close()
+
+    def bind_source(self, source: str):
+        """
+        Привязка базы к сайту экспорта
+
+        Первый импорт запоминает сайт, последующие проверяют, что экспорт
+        с того же сайта: маппинг другого форума указывал бы на чужие объекты.
+
+        Args:
+            source: Сайт экспорта (схема и хост URL объектов)
+
+        Raises:
+            ValueError: Если база создана для экспорта другого сайта
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+
+        if row is None:
+            with self.conn:
+                self.conn.execute("INSERT INTO meta (key, value) VALUES ('source', ?)", (source,))
+            return
+
+        if row[0] != source:
+            raise ValueError(
+                f"База маппинга {self.db_path} создана для экспорта {row[0]}, "
+                f"а импортируется экспорт {source}; укажите другой import.mapping_db"
+            )
+
+    def get(self, kind: str, wix_id: str) -> Optional[Any]:
+        """
+        ID объекта в Discourse
+
+        Args:
+            kind: Тип объекта (KIND_*)
+            wix_id: ID объекта в экспорте WIX
+
+        Returns:
+            ID (или URL для вложений) в Discourse либо None
+        """
+        return self._mapping.get(kind, {}).get(str(wix_id))
+
+    def set(self, kind: str, wix_id: str, discourse_id: Any, data: Optional[Dict] = None):
+        """
+        Сохранить соответствие (запись фиксируется сразу)
+
+        Args:
+            kind: Тип объекта (KIND_*)
+            wix_id: ID объекта в экспорте WIX
+            discourse_id: ID (или URL) объекта в Discourse
+            data: Дополнительные данные (сохраняются как JSON)
+        """
+        wix_id = str(wix_id)
+
+        with self.conn:
+            self.conn.execute(
+                """INSERT OR REPLACE INTO mapping (kind, wix_id, discourse_id, data, created_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (kind, wix_id, discourse_id,
+                 json.dumps(data, ensure_ascii=False) if data else None,
+                 datetime.now().isoformat())
+            )
+
+        self._mapping.setdefault(kind, {})[wix_id] = discourse_id
+
+    def values(self, kind: str) -> List[Any]:
+        """ID в Discourse всех записей типа"""
+        return list(self._mapping.get(kind, {}).values())
+
+    def get_data(self, kind: str, wix_id: str) -> Optional[Dict]:
+        """
+        Дополнительные данные записи (читаются из базы)
+
+        Args:
+            kind: Тип объекта (KIND_*)
+            wix_id: ID объекта в экспорте WIX
+
+        Returns:
+            Словарь, переданный в set(), или None
+        """
+        row = self.conn.execute(
+            "SELECT data FROM mapping WHERE kind = ? AND wix_id = ?",
+            (kind, str(wix_id))
+        ).fetchone()
+
+        return json.loads(row[0]) if row and row[0] else None
+
+    def counts(self) -> Dict[str, int]:
+        """Количество записей по типам"""
+        return {kind: len(ids) for kind, ids in self._mapping.items()}
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Пережатие изображений перед загрузкой в Discourse
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from loguru import logger
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow - необязательная зависимость
+    Image = None
+    ImageOps = None
+
+from parser.attachment_store import sha256_file
+
+
+IMAGE_FORMATS = {
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.png': 'PNG',
+}
+
+
+def optimize_image(
+    source: str,
+    target: str,
+    max_width: int,
+    max_height: int,
+    jpeg_quality: int
+) -> int:
+    """
+    Уменьшение и пережатие изображения (выполняется в отдельном процессе)
+
+    Args:
+        source: Путь к исходному файлу
+        target: Путь для результата
+        max_width: Максимальная ширина
+        max_height: Максимальная высота
+        jpeg_quality: Качество JPEG (1-95)
+
+    Returns:
+        Размер результата в байтах
+    """
+    image_format = IMAGE_FORMATS[Path(source).suffix.lower()]
+    temp_target = f"{target}.tmp"
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_width, max_height), Image.LANCZOS)
+
+        if image_format == 'JPEG':
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(temp_target, 'JPEG', quality=jpeg_quality, optimize=True, progressive=True)
+        else:
+            image.save(temp_target, 'PNG', optimize=True)
+
+    os.replace(temp_target, target)
+    return os.path.getsize(target)
+
+
+class ImageOptimizer:
+    """Пережатие JPEG/PNG вложений в пуле процессов с кэшем результатов"""
+
+    def __init__(self, config: Dict):
+        """
+        Инициализация
+
+        Args:
+            config: Секция attachments.image_optimization из discourse_config.yaml
+        """
+        self.max_width = config.get('max_width', 1920)
+        self.max_height = config.get('max_height', 1920)
+        self.jpeg_quality = config.get('jpeg_quality', 85)
+        self.cache_dir = Path(config.get('cache_dir', './data/image_cache'))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.enabled = Image is not None
+        if not self.enabled:
+            logger.warning("Pillow не установлен, пережатие изображений отключено")
+
+        self._pool = ProcessPoolExecutor(max_workers=config.get('workers')) if self.enabled else None
+
+        # Ключ настроек: при их изменении кэш пересчитывается
+        self._settings_key = hashlib.sha256(json.dumps(
+            [self.max_width, self.max_height, self.jpeg_quality]
+        ).encode()).hexdigest()[:12]
+
+        self.stats = {
+            'images_optimized': 0,
+            'images_cached': 0,
+            'bytes_saved': 0,
+        }
+
+    def shutdown(self):
+        """Остановить пул процессов"""
+        if self._pool:
+            self._pool.shutdown()
+
+    async def optimize(self, file_path: str, source_hash: Optional[str] = None) -> str:
+        """
+        Получить путь к оптимизированной версии изображения
+
+        Args:
+            file_path: Путь к исходному файлу
+            source_hash: SHA-256 исходного файла, если уже известен
+                (иначе вычисляется)
+
+        Returns:
+            Путь к пережатому файлу или исходный путь, если файл не изображение,
+            пережатие не уменьшило размер или произошла ошибка
+        """
+        source = Path(file_path)
+        extension = source.suffix.lower()
+
+        if not self.enabled or extension not in IMAGE_FORMATS or not source.exists():
+            return file_path
+
+        loop = asyncio.get_running_loop()
+        source_size = source.stat().st_size
+        if not source_hash:
+            source_hash = await loop.run_in_executor(None, sha256_file, source)
+
+        target = self.cache_dir / f"{source_hash}_{self._settings_key}{extension}"
+        # Маркер: пережатие не дало выигрыша, использовать исходный файл
+        skip_marker = target.with_name(target.name + '.skip')
+
+        if skip_marker.exists():
+            return file_path
+
+        if target.exists():
+            self.stats['images_cached'] += 1
+            self.stats['bytes_saved'] += source_size - target.stat().st_size
+            return str(target)
+
+        try:
+            optimized_size = await loop.run_in_executor(
+                self._pool,
+                optimize_image,
+                str(source),
+                str(target),
+                self.max_width,
+                self.max_height,
+                self.jpeg_quality
+            )
+        except Exception as e:
+            logger.warning(f"Не удалось пережать изображение {source}: {e}")
+            return file_path
+
+        if optimized_size >= source_size:
+            target.unlink(missing_ok=True)
+            skip_marker.touch()
+            return file_path
+
+        self.stats['images_optimized'] += 1
+        self.stats['bytes_saved'] += source_size - optimized_size
+        logger.debug(
+            f"Пережато изображение {source.name}: "
+            f"{source_size / 1024:.0f} KB → {optimized_size / 1024:.0f} KB"
+        )
+
+        return str(target)
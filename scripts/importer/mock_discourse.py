@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Локальный имитатор API Discourse для замеров производительности импорта
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+import time
+from typing import Dict, Optional
+
+from aiohttp import web
+from loguru import logger
+
+
+class MockDiscourseServer:
+    """
+    Имитация эндпоинтов Discourse, которые использует DiscourseImporter
+
+    Поддерживает задержку ответа, ограничение частоты запросов с ответами
+    429 (Retry-After и extras.wait_seconds, как у Discourse) и случайные
+    ответы 502. Списки топиков, как и в Discourse, доступны только по
+    каноническому пути /c/{slug}/{id}.json (остальные пути - редирект 301).
+    Данные хранятся в памяти.
+    """
+
+    TOPICS_PER_PAGE = 30
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        latency_jitter: float = 0.02,
+        rate_limit: float = 0,
+        rate_limit_burst: Optional[float] = None,
+        error_rate: float = 0,
+        seed: Optional[int] = None
+    ):
+        """
+        Инициализация
+
+        Args:
+            latency: Средняя задержка ответа (секунды)
+            latency_jitter: Разброс задержки (секунды, равномерно ±)
+            rate_limit: Допустимое количество запросов в секунду (0 - без ограничения)
+            rate_limit_burst: Допустимый всплеск запросов (по умолчанию равен rate_limit)
+            error_rate: Доля запросов, на которые отвечать 502
+            seed: Начальное значение генератора случайных чисел
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = rate_limit_burst or rate_limit
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+        self._tokens = self.rate_limit_burst
+        self._tokens_updated = time.monotonic()
+
+        self.categories: Dict[int, Dict] = {}
+        self.topics: Dict[int, Dict] = {}
+        self.posts: Dict[int, Dict] = {}
+        self.uploads: Dict[str, Dict] = {}
+        self.users: Dict[str, Dict] = {}
+        self._next_id = {'category': 1, 'topic': 1, 'post': 1, 'upload': 1, 'user': 1}
+
+        self.stats = {
+            'requests': 0,
+            'throttled': 0,
+            'server_errors': 0,
+            'by_endpoint': {},
+        }
+
+        self.app = web.Application(
+            middlewares=[self._middleware],
+            client_max_size=1024 ** 3
+        )
+        self.app.add_routes([
+            web.get('/site.json', self.get_site),
+            web.get(r'/c/{category_id:\d+}.json', self.redirect_category),
+            web.get(r'/c/{slug_path:.+}/{category_id:\d+}.json', self.get_category_topics),
+            web.post('/categories.json', self.create_category),
+            web.post('/posts.json', self.create_post),
+            web.post('/uploads.json', self.create_upload),
+            web.get('/u/{username}.json', self.get_user),
+            web.post('/users.json', self.create_user),
+        ])
+
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        Запуск сервера
+
+        Args:
+            host: Адрес
+            port: Порт (0 - любой свободный)
+
+        Returns:
+            Базовый URL сервера
+        """
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}"
+        logger.info(f"Имитатор Discourse запущен: {self.base_url}")
+
+        return self.base_url
+
+    async def stop(self):
+        """Остановка сервера"""
+        if self._runner:
+            await self._runner.cleanup()
+
+    def _new_id(self, kind: str) -> int:
+        """Следующий ID объекта"""
+        new_id = self._next_id[kind]
+        self._next_id[kind] += 1
+        return new_id
+
+    def _take_token(self) -> Optional[float]:
+        """Списать запрос из лимита; время ожидания, если лимит исчерпан"""
+        if self.rate_limit <= 0:
+            return None
+
+        now = time.monotonic()
+        self._tokens = min(
+            self.rate_limit_burst,
+            self._tokens + (now - self._tokens_updated) * self.rate_limit
+        )
+        self._tokens_updated = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return None
+
+        return (1 - self._tokens) / self.rate_limit
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        """Учет запросов, задержка, лимит частоты и случайные ошибки"""
+        resource = request.match_info.route.resource
+        endpoint = f"{request.method} {resource.canonical if resource else request.path}"
+        self.stats['requests'] += 1
+        self.stats['by_endpoint'][endpoint] = self.stats['by_endpoint'].get(endpoint, 0) + 1
+
+        delay = self.latency + self.random.uniform(-self.latency_jitter, self.latency_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        wait_seconds = self._take_token()
+        if wait_seconds is not None:
+            self.stats['throttled'] += 1
+            return web.json_response(
+                {
+                    'errors': ["You've performed this action too many times. Please wait."],
+                    'error_type': 'rate_limit',
+                    'extras': {'wait_seconds': math.ceil(wait_seconds)},
+                },
+                status=429,
+                headers={'Retry-After': str(math.ceil(wait_seconds))}
+            )
+
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.stats['server_errors'] += 1
+            return web.Response(status=502, text='Bad Gateway')
+
+        return await handler(request)
+
+    @staticmethod
+    def _error(message: str, status: int = 422) -> web.Response:
+        """Ответ об ошибке в формате Discourse"""
+        return web.json_response({'errors': [message]}, status=status)
+
+    async def get_site(self, request: web.Request) -> web.Response:
+        """GET /site.json - категории"""
+        return web.json_response({'categories': list(self.categories.values())})
+
+    def _slug_path(self, category: Dict) -> str:
+        """Путь категории из slug родителя и ее slug"""
+        parent = self.categories.get(category.get('parent_category_id'))
+        return f"{parent['slug']}/{category['slug']}" if parent else category['slug']
+
+    def _canonical_redirect(self, request: web.Request, category: Dict):
+        """301 на /c/{slug}/{id}.json с теми же параметрами, как у Discourse"""
+        location = request.rel_url.with_path(f"/c/{self._slug_path(category)}/{category['id']}.json")
+        raise web.HTTPMovedPermanently(location=str(location))
+
+    async def redirect_category(self, request: web.Request) -> web.Response:
+        """GET /c/{id}.json - Discourse отвечает редиректом на канонический путь"""
+        category = self.categories.get(int(request.match_info['category_id']))
+        if not category:
+            return self._error('not found', status=404)
+
+        self._canonical_redirect(request, category)
+
+    async def get_category_topics(self, request: web.Request) -> web.Response:
+        """GET /c/{slug}/{id}.json - страница списка топиков категории"""
+        category_id = int(request.match_info['category_id'])
+        page = int(request.query.get('page', 0))
+
+        category = self.categories.get(category_id)
+        if not category:
+            return self._error('not found', status=404)
+
+        if request.match_info['slug_path'] != self._slug_path(category):
+            self._canonical_redirect(request, category)
+
+        topics = [
+            {'id': topic['id'], 'title': topic['title'], 'category_id': topic['category_id']}
+            for topic in self.topics.values() if topic['category_id'] == category_id
+        ]
+        start = page * self.TOPICS_PER_PAGE
+        page_topics = topics[start:start + self.TOPICS_PER_PAGE]
+
+        topic_list = {'topics': page_topics}
+        if start + self.TOPICS_PER_PAGE < len(topics):
+            topic_list['more_topics_url'] = f"/c/{self._slug_path(category)}/{category_id}?page={page + 1}"
+
+        return web.json_response({'topic_list': topic_list})
+
+    async def create_category(self, request: web.Request) -> web.Response:
+        """POST /categories.json"""
+        payload = await request.json()
+        parent_id = payload.get('parent_category_id')
+
+        for category in self.categories.values():
+            if category['name'] == payload['name'] and category.get('parent_category_id') == parent_id:
+                return self._error('Category Name has already been taken')
+
+        category = {
+            'id': self._new_id('category'),
+            'name': payload['name'],
+            'slug': payload.get('slug') or payload['name'].lower(),
+            'color': payload.get('color'),
+            'parent_category_id': parent_id,
+        }
+        self.categories[category['id']] = category
+
+        return web.json_response({'category': category})
+
+    async def create_post(self, request: web.Request) -> web.Response:
+        """POST /posts.json - новый топик или ответ в топике"""
+        payload = await request.json()
+        username = request.headers.get('Api-Username')
+
+        if not payload.get('raw'):
+            return self._error('Body is too short')
+
+        if 'topic_id' in payload:
+            topic = self.topics.get(int(payload['topic_id']))
+            if not topic:
+                return self._error('topic not found', status=404)
+        else:
+            if int(payload.get('category', 0)) not in self.categories:
+                return self._error('Category is invalid')
+
+            topic = {
+                'id': self._new_id('topic'),
+                'title': payload['title'],
+                'category_id': int(payload['category']),
+                'posts_count': 0,
+            }
+            self.topics[topic['id']] = topic
+
+        topic['posts_count'] += 1
+        post = {
+            'id': self._new_id('post'),
+            'topic_id': topic['id'],
+            'post_number': topic['posts_count'],
+            'username': username,
+            'created_at': payload.get('created_at'),
+        }
+        self.posts[post['id']] = post
+
+        return web.json_response(post)
+
+    async def create_upload(self, request: web.Request) -> web.Response:
+        """POST /uploads.json - загрузка файла (multipart)"""
+        reader = await request.multipart()
+        sha1 = hashlib.sha1()
+        filename = None
+        size = 0
+
+        async for part in reader:
+            if part.name != 'file':
+                continue
+
+            filename = part.filename
+            while True:
+                chunk = await part.read_chunk()
+                if not chunk:
+                    break
+                sha1.update(chunk)
+                size += len(chunk)
+
+        if filename is None:
+            return self._error('file is required')
+
+        digest = sha1.hexdigest()
+        extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+
+        upload = self.uploads.get(digest)
+        if not upload:
+            upload = {
+                'id': self._new_id('upload'),
+                'url': f"/uploads/default/original/1X/{digest}.{extension}",
+                'short_url': f"upload://{digest[:27]}.{extension}",
+                'original_filename': filename,
+                'extension': extension,
+                'filesize': size,
+                'width': None,
+                'height': None,
+            }
+            self.uploads[digest] = upload
+
+        return web.json_response(upload)
+
+    async def get_user(self, request: web.Request) -> web.Response:
+        """GET /u/{username}.json"""
+        user = self.users.get(request.match_info['username'].lower())
+        if not user:
+            return self._error('not found', status=404)
+        return web.json_response({'user': user})
+
+    async def create_user(self, request: web.Request) -> web.Response:
+        """POST /users.json"""
+        payload = await request.json()
+        username = payload['username']
+
+        if username.lower() in self.users:
+            return web.json_response({'success': False, 'message': 'Username is taken'})
+
+        user = {
+            'id': self._new_id('user'),
+            'username': username,
+            'name': payload.get('name'),
+        }
+        self.users[username.lower()] = user
+
+        return web.json_response({'success': True, 'active': True, 'user_id': user['id']})
+
+    def summary(self) -> Dict:
+        """Сводка по созданным объектам и запросам"""
+        return {
+            **self.stats,
+            'categories': len(self.categories),
+            'topics': len(self.topics),
+            'posts': len(self.posts),
+            'uploads': len(self.uploads),
+            'users': len(self.users),
+        }
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Генерация синтетического экспорта форума заданного размера
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+
+WORDS = (
+    "трал судно рейс улов эхолот настройка линия датчик ремонт замена "
+    "двигатель насос журнал вахта порт груз сеть лебедка компас радар "
+    "vessel sonar winch engine catch report maintenance sensor cable"
+).split()
+
+# Сигнатуры файлов, чтобы вложения выглядели как настоящие
+FILE_HEADERS = {
+    '.pdf': b'%PDF-1.4\n',
+    '.png': b'\x89PNG\r\n\x1a\n',
+    '.docx': b'PK\x03\x04word/',
+}
+
+
+class SyntheticExportGenerator:
+    """Экспорт в формате WixForumParser.save_results со случайным содержимым"""
+
+    def __init__(
+        self,
+        categories: int = 3,
+        subcategories: int = 3,
+        posts: int = 20,
+        comments: int = 3,
+        attachments: int = 1,
+        attachment_pool: int = 50,
+        attachment_size: int = 64 * 1024,
+        paragraphs: int = 4,
+        authors: int = 30,
+        seed: Optional[int] = None
+    ):
+        """
+        Инициализация
+
+        Args:
+            categories: Количество категорий
+            subcategories: Подкатегорий в категории
+            posts: Постов в подкатегории
+            comments: Комментариев в посте (в среднем)
+            attachments: Вложений в посте (в среднем)
+            attachment_pool: Количество разных файлов (вложения повторяются,
+                как одинаковые файлы в разных постах на реальном форуме)
+            attachment_size: Размер файла вложения (байты)
+            paragraphs: Абзацев в посте (в среднем)
+            authors: Количество разных авторов
+            seed: Начальное значение генератора случайных чисел
+        """
+        self.categories = categories
+        self.subcategories = subcategories
+        self.posts = posts
+        self.comments = comments
+        self.attachments = attachments
+        self.attachment_pool = attachment_pool
+        self.attachment_size = attachment_size
+        self.paragraphs = paragraphs
+        self.authors = [f"Автор {index + 1}" for index in range(authors)]
+        self.random = random.Random(seed)
+
+        self.stats = {
+            'categories': 0,
+            'subcategories': 0,
+            'posts': 0,
+            'comments': 0,
+            'attachments': 0,
+        }
+
+    def _text(self, words: int) -> str:
+        """Случайный текст"""
+        return ' '.join(self.random.choice(WORDS) for _ in range(words))
+
+    def _html(self, paragraphs: int) -> str:
+        """Случайный HTML с типичной для WIX разметкой"""
+        parts = []
+        for index in range(max(1, paragraphs)):
+            if index % 3 == 1:
+                items = ''.join(f"<li>{self._text(6)}</li>" for _ in range(3))
+                parts.append(f"<ul>{items}</ul>")
+            else:
+                parts.append(
+                    f"<p>{self._text(25)} <strong>{self._text(3)}</strong> {self._text(15)}</p>"
+                )
+        return ''.join(parts)
+
+    def _around(self, mean: int) -> int:
+        """Случайное количество со средним mean"""
+        return self.random.randint(0, mean * 2) if mean else 0
+
+    def _write_attachments(self, attachments_dir: Path) -> list:
+        """Создание файлов вложений"""
+        attachments_dir.mkdir(parents=True, exist_ok=True)
+        files = []
+
+        for index in range(self.attachment_pool):
+            extension = list(FILE_HEADERS)[index % len(FILE_HEADERS)]
+            path = attachments_dir / f"file_{index + 1}{extension}"
+            header = FILE_HEADERS[extension]
+            path.write_bytes(header + self.random.randbytes(max(0, self.attachment_size - len(header))))
+            files.append(path)
+
+        return files
+
+    def _post(self, post_id: str, created_at: datetime, files: list) -> Dict:
+        """Пост с комментариями и вложениями"""
+        comments = []
+        for index in range(self._around(self.comments)):
+            comments.append({
+                'id': f"{post_id}_comment_{index + 1}",
+                'author': self.random.choice(self.authors),
+                'created_at': (created_at + timedelta(hours=index + 1)).isoformat(),
+                'content': self._html(1),
+            })
+
+        attachments = []
+        for _ in range(self._around(self.attachments) if files else 0):
+            path = self.random.choice(files)
+            attachments.append({
+                'filename': path.name,
+                'url': f"https://example.usrfiles.com/ugd/{path.stem}",
+                'local_path': str(path),
+                'downloaded': True,
+            })
+
+        self.stats['posts'] += 1
+        self.stats['comments'] += len(comments)
+        self.stats['attachments'] += len(attachments)
+
+        return {
+            'id': post_id,
+            'title': f"{self._text(5).capitalize()} {post_id}",
+            'url': f"https://example.com/forum/post/{post_id}",
+            'author': self.random.choice(self.authors),
+            'created_at': created_at.isoformat(),
+            'description': self._text(12),
+            'content': self._html(self._around(self.paragraphs)),
+            'attachments': attachments,
+            'comments': comments,
+        }
+
+    def generate(self, output_dir: str) -> Path:
+        """
+        Запись экспорта (потоково, без сборки всей структуры в памяти)
+
+        Args:
+            output_dir: Директория для файла экспорта и вложений
+
+        Returns:
+            Путь к forum_structure_synthetic.json
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        files = self._write_attachments(output_dir / 'attachments') if self.attachments else []
+        export_file = output_dir / 'forum_structure_synthetic.json'
+        created_at = datetime(2020, 1, 1)
+
+        with open(export_file, 'w', encoding='utf-8') as f:
+            f.write('{"export_date": %s, "forum_url": "https://example.com/forum/", "categories": ['
+                    % json.dumps(datetime.now().isoformat()))
+
+            for cat_index in range(self.categories):
+                category_id = f"cat_{cat_index + 1}"
+                category = {
+                    'id': category_id,
+                    'title': f"Категория {cat_index + 1}",
+                    'url': f"https://example.com/forum/category-{cat_index + 1}",
+                    'description': self._text(10),
+                }
+                f.write((',' if cat_index else '') + json.dumps(category, ensure_ascii=False)[:-1])
+                f.write(', "subcategories": [')
+                self.stats['categories'] += 1
+
+                for sub_index in range(self.subcategories):
+                    subcategory_id = f"{category_id}_sub_{sub_index + 1}"
+                    subcategory = {
+                        'id': subcategory_id,
+                        'title': f"Раздел {cat_index + 1}.{sub_index + 1}",
+                        'url': f"https://example.com/forum/section-{cat_index + 1}-{sub_index + 1}",
+                        'description': self._text(8),
+                    }
+                    f.write((',' if sub_index else '') + json.dumps(subcategory, ensure_ascii=False)[:-1])
+                    f.write(', "posts": [')
+                    self.stats['subcategories'] += 1
+
+                    for post_index in range(self.posts):
+                        created_at += timedelta(hours=self.random.randint(1, 48))
+                        post = self._post(f"{subcategory_id}_post_{post_index + 1}", created_at, files)
+                        f.write((',' if post_index else '') + json.dumps(post, ensure_ascii=False))
+
+                    f.write(']}')
+
+                f.write(']}')
+
+            f.write('], "statistics": %s}' % json.dumps(self.stats))
+
+        return export_file
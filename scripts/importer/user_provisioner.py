@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Сопоставление авторов WIX пользователям Discourse
+"""
+
+import asyncio
+import json
+import re
+import secrets
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+
+from .id_mapping import IdMappingStore
+
+
+# Ключ маппинга для архивного пользователя (имена авторов WIX не пустые)
+ARCHIVE_KEY = ''
+
+
+def make_username(author: str, prefix: str, max_length: int, taken: set) -> str:
+    """
+    Имя пользователя Discourse по имени автора
+
+    Разные авторы с совпадающим после транслитерации именем
+    получают числовой суффикс.
+
+    Args:
+        author: Имя автора из экспорта
+        prefix: Префикс имени
+        max_length: Максимальная длина username
+        taken: Уже занятые имена (результат добавляется)
+
+    Returns:
+        username
+    """
+    from slugify import slugify
+
+    base = prefix + slugify(author, separator='_')
+    base = re.sub(r'[^a-z0-9_.-]', '', base.lower()) or 'user'
+    if len(base) < 3:
+        base = f"{base}_wix"
+    base = base[:max_length]
+
+    username = base
+    suffix = 1
+    while username in taken:
+        suffix += 1
+        username = f"{base[:max_length - len(str(suffix))]}{suffix}"
+
+    taken.add(username)
+    return username
+
+
+class UserProvisioner:
+    """
+    Подготовка пользователей Discourse для авторов экспорта
+
+    Пользователь ищется или создается при первом посте автора, результат
+    кэшируется и сохраняется в маппинге ID (тип 'user'), поэтому повторные
+    посты и повторный запуск обходятся без API запросов, а экспорт не
+    читается отдельным проходом.
+
+    Стратегии (users.strategy):
+        single_archive - все посты от архивного пользователя
+        create_by_name - пользователь на каждого автора; существующий
+            аккаунт используется, только если его создал импорт (записан
+            в маппинге ID), иначе берется имя со следующим суффиксом
+        mapping_file - имена пользователей из JSON файла {"автор": "username"}
+    Авторы, для которых пользователя получить не удалось, публикуются
+    от архивного пользователя.
+    """
+
+    STRATEGIES = ('single_archive', 'create_by_name', 'mapping_file')
+
+    # Сколько занятых имен перебрать для одного автора
+    MAX_USERNAME_ATTEMPTS = 20
+
+    def __init__(
+        self,
+        config: Dict,
+        api_request: Callable[..., Awaitable[Optional[Dict]]],
+        id_mapping: IdMappingStore
+    ):
+        """
+        Инициализация
+
+        Args:
+            config: Конфигурация из discourse_config.yaml
+            api_request: Функция API запроса (DiscourseImporter._api_request)
+            id_mapping: Персистентный маппинг ID
+        """
+        self.config = config
+        self.users_config = config.get('users', {})
+        self.strategy = self.users_config.get('strategy', 'single_archive')
+        self.dry_run = config['import']['dry_run']
+        self.api_request = api_request
+        self.id_mapping = id_mapping
+
+        self.archive_username = self.users_config.get(
+            'archive_username', config['api']['username']
+        )
+        self.max_length = self.users_config.get('max_username_length', 20)
+
+        if self.strategy not in self.STRATEGIES:
+            logger.warning(
+                f"Неизвестная стратегия пользователей '{self.strategy}', "
+                f"используется single_archive"
+            )
+            self.strategy = 'single_archive'
+
+        # Автор → username (заполняется по мере импорта, см. username_for)
+        self.usernames: Dict[str, str] = {}
+        self._resolving: Dict[str, asyncio.Future] = {}
+        self._mapping_file: Dict[str, str] = {}
+        self._taken: set = set()
+
+        self.stats = {
+            'users_created': 0,
+            'users_existing': 0,
+            'users_failed': 0,
+        }
+
+    async def prepare(self):
+        """Архивный пользователь и файл маппинга (авторы - по мере импорта)"""
+        await self._ensure_archive_user()
+
+        if self.strategy == 'mapping_file':
+            self._mapping_file = self._load_mapping_file()
+
+        # Имена, уже выданные авторам (новые суффиксы не должны с ними совпасть)
+        self._taken = set(self.id_mapping.values(IdMappingStore.KIND_USER))
+
+    async def username_for(self, author: Optional[str]) -> str:
+        """
+        Имя пользователя Discourse для автора
+
+        Пользователь готовится при первом посте автора; одновременные
+        запросы для одного автора ждут одной подготовки, результат
+        запоминается (и сохраняется в маппинге ID).
+
+        Args:
+            author: Имя автора из экспорта
+
+        Returns:
+            username (архивный пользователь, если автор неизвестен или
+            пользователя получить не удалось)
+        """
+        author = (author or '').strip()
+        if not author or self.strategy == 'single_archive':
+            return self.archive_username
+
+        task = self._resolving.get(author)
+        if task is None:
+            task = asyncio.ensure_future(self._resolve(author))
+            self._resolving[author] = task
+
+        return await task or self.archive_username
+
+    async def _resolve(self, author: str) -> Optional[str]:
+        """Поиск в маппинге ID, иначе подготовка пользователя по стратегии"""
+        username = self.id_mapping.get(IdMappingStore.KIND_USER, author)
+
+        if not username:
+            if self.strategy == 'create_by_name':
+                prefix = self.users_config.get('username_prefix', '')
+                candidate = make_username(author, prefix, self.max_length, self._taken)
+                username = await self._claim_username(author, candidate, self._taken)
+            elif author in self._mapping_file:
+                username = await self._lookup_or_create(
+                    self._mapping_file[author], name=author, create=False
+                )
+
+            if not username:
+                logger.warning(
+                    f"Автор {author} без пользователя Discourse "
+                    f"(публикуется от {self.archive_username})"
+                )
+                return None
+
+            if not self.dry_run:
+                self.id_mapping.set(IdMappingStore.KIND_USER, author, username)
+
+        self.usernames[author] = username
+        return username
+
+    async def _ensure_archive_user(self):
+        """Поиск или создание архивного пользователя"""
+        if self.id_mapping.get(IdMappingStore.KIND_USER, ARCHIVE_KEY) == self.archive_username:
+            return
+
+        username = await self._lookup_or_create(
+            self.archive_username,
+            name=self.archive_username,
+            email=self.users_config.get('archive_email'),
+            create=True
+        )
+
+        if not username:
+            logger.error(
+                f"Архивный пользователь {self.archive_username} недоступен, "
+                f"вместо него используется {self.config['api']['username']}"
+            )
+            self.archive_username = self.config['api']['username']
+            return
+
+        if not self.dry_run:
+            self.id_mapping.set(IdMappingStore.KIND_USER, ARCHIVE_KEY, username)
+
+    def _load_mapping_file(self) -> Dict[str, str]:
+        """Чтение файла маппинга авторов"""
+        mapping_path = Path(self.users_config.get('mapping_file', './config/user_mapping.json'))
+
+        if not mapping_path.exists():
+            logger.error(f"Файл маппинга пользователей не найден: {mapping_path}")
+            return {}
+
+        with open(mapping_path, 'r', encoding='utf-8') as f:
+            return {author.strip(): username for author, username in json.load(f).items()}
+
+    async def _claim_username(self, author: str, username: str, taken: set) -> Optional[str]:
+        """
+        Пользователь для автора (стратегия create_by_name)
+
+        Аккаунт с тем же именем, созданный не импортом, не используется:
+        иначе посты автора WIX "Admin" или "John Smith" достались бы
+        постороннему пользователю Discourse.
+
+        Args:
+            author: Имя автора из экспорта
+            username: Сгенерированное имя пользователя
+            taken: Уже выданные имена (для следующего суффикса)
+
+        Returns:
+            username или None, если пользователя создать не удалось
+        """
+        if self.dry_run:
+            logger.debug(f"[DRY RUN] Пользователь: {author} → {username}")
+            return username
+
+        prefix = self.users_config.get('username_prefix', '')
+
+        for _ in range(self.MAX_USERNAME_ATTEMPTS):
+            result = await self.api_request('GET', f'/u/{username}.json', allow_not_found=True)
+
+            if not result or 'user' not in result:
+                return await self._create_user(username, name=author)
+
+            existing = result['user']['username']
+            if self.id_mapping.get(IdMappingStore.KIND_CREATED_USER, existing.lower()):
+                self.stats['users_existing'] += 1
+                return existing
+
+            logger.info(
+                f"Имя {existing} занято пользователем, созданным не импортом; "
+                f"для автора {author} выбирается другое"
+            )
+            username = make_username(author, prefix, self.max_length, taken)
+
+        logger.error(f"Не найдено свободное имя пользователя для автора {author}")
+        self.stats['users_failed'] += 1
+        return None
+
+    async def _lookup_or_create(
+        self,
+        username: str,
+        name: str,
+        email: Optional[str] = None,
+        create: bool = True
+    ) -> Optional[str]:
+        """
+        Поиск пользователя по username и создание при отсутствии
+
+        Args:
+            username: Имя пользователя Discourse
+            name: Отображаемое имя
+            email: Email (по умолчанию - username@<домен archive_email>)
+            create: Создавать отсутствующего пользователя
+
+        Returns:
+            username или None, если пользователь не найден и не создан
+        """
+        if self.dry_run:
+            logger.debug(f"[DRY RUN] Пользователь: {name} → {username}")
+            return username
+
+        result = await self.api_request('GET', f'/u/{username}.json', allow_not_found=True)
+        if result and 'user' in result:
+            self.stats['users_existing'] += 1
+            return result['user']['username']
+
+        if not create:
+            self.stats['users_failed'] += 1
+            return None
+
+        return await self._create_user(username, name, email)
+
+    async def _create_user(
+        self,
+        username: str,
+        name: str,
+        email: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Создание пользователя (записывается в маппинге ID как созданный импортом)
+
+        Args:
+            username: Имя пользователя Discourse
+            name: Отображаемое имя
+            email: Email (по умолчанию - username@<домен archive_email>)
+
+        Returns:
+            username или None при ошибке
+        """
+        if not email:
+            domain = self.users_config.get('archive_email', 'archive@example.com').split('@')[-1]
+            email = f"{username}@{domain}"
+
+        result = await self.api_request(
+            'POST',
+            '/users.json',
+            json={
+                'name': name,
+                'username': username,
+                'email': email,
+                'password': secrets.token_urlsafe(24),
+                'active': True,
+                'approved': True,
+            }
+        )
+
+        if result and result.get('success'):
+            logger.info(f"Создан пользователь: {name} → {username}")
+            self.id_mapping.set(IdMappingStore.KIND_CREATED_USER, username.lower(), username)
+            self.stats['users_created'] += 1
+            return username
+
+        logger.error(f"Не удалось создать пользователя {username}: {result}")
+        self.stats['users_failed'] += 1
+        return None
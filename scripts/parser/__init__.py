@@ -1,10 +1,26 @@
 """
 Модуль парсинга WIX форума
+
+Модули загружаются лениво: importer использует parser.export_reader и
+parser.markdown_cache, и импорт пакета не должен тянуть за собой
+Playwright и парсер целиком.
 """
 
-from .wix_parser import WixForumParser
-from .attachment_downloader import AttachmentDownloader
-from . import utils
+import importlib
+
+_EXPORTS = {
+    'WixForumParser': '.wix_parser',
+    'AttachmentDownloader': '.attachment_downloader',
+    'MultiSiteRunner': '.multi_site',
+}
+
+__all__ = ['WixForumParser', 'AttachmentDownloader', 'MultiSiteRunner', 'utils']
 
-__all__ = ['WixForumParser', 'AttachmentDownloader', 'utils']
 
+def __getattr__(name):
+    if name == 'utils':
+        return importlib.import_module('.utils', __name__)
+    if name in _EXPORTS:
+        module = importlib.import_module(_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
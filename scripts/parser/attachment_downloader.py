@@ -5,7 +5,10 @@
 
 import asyncio
 import hashlib
+import json
 import logging
+import random
+import time
 from pathlib import Path
 from typing import Dict, List, Optional
 from urllib.parse import urlparse
@@ -13,9 +16,47 @@ from urllib.parse import urlparse
 import aiohttp
 from tqdm import tqdm
 
+from .attachment_store import AttachmentStore, sha256_file, update_sha256
+from .content_sniffer import (
+    SNIFF_SIZE,
+    is_html_content_type,
+    normalize_extension,
+    sniff_content
+)
+from .download_manifest import DownloadManifest
+from .rate_limit import ThroughputMeter, TokenBucket
+
 logger = logging.getLogger(__name__)
 
 
+# HTTP статусы, при которых загрузку имеет смысл повторить
+TRANSIENT_HTTP_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class DownloadError(Exception):
+    """Ошибка загрузки вложения с классификацией причины"""
+    
+    def __init__(
+        self,
+        reason: str,
+        http_status: Optional[int] = None,
+        transient: bool = False,
+        retryable: Optional[bool] = None
+    ):
+        """
+        Args:
+            reason: Причина ошибки (ключ для статистики)
+            http_status: HTTP статус ответа
+            transient: Временная ошибка, повторять в текущем запуске
+            retryable: Повторять при следующих запусках (по умолчанию = transient)
+        """
+        super().__init__(reason)
+        self.reason = reason
+        self.http_status = http_status
+        self.transient = transient
+        self.retryable = transient if retryable is None else retryable
+
+
 class AttachmentDownloader:
     """Класс для скачивания вложений"""
     
@@ -30,23 +71,89 @@ class AttachmentDownloader:
         self.download_dir = Path(config['attachments']['download_dir'])
         self.download_dir.mkdir(parents=True, exist_ok=True)
         
+        # Хранилище с адресацией по содержимому и манифест загрузок
+        self.store = AttachmentStore(self.download_dir)
+        self.manifest = DownloadManifest(self.download_dir / 'manifest.db')
+        
+        # Блокировки по URL: один и тот же файл не качается параллельно
+        self._url_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Ограничения параллельности
+        attachments_config = config['attachments']
+        self.max_concurrent = attachments_config.get('max_concurrent_downloads', 8)
+        self.max_per_host = attachments_config.get('max_connections_per_host', 4)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        
+        # Размер блока при потоковой записи на диск
+        self.chunk_size = attachments_config.get('chunk_size', 256 * 1024)
+        
+        # Таймаут ожидания данных (а не всей загрузки: большие файлы
+        # докачиваются при следующем запуске)
+        self.timeout = aiohttp.ClientTimeout(
+            total=None,
+            sock_connect=30,
+            sock_read=attachments_config.get('read_timeout', 60)
+        )
+        
+        # Фоновая очередь загрузок (ограниченный размер = обратное давление)
+        self.queue_size = attachments_config.get('queue_size', 100)
+        self.queue_workers = attachments_config.get('queue_workers', 4)
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        
+        # Периодический вывод прогресса фоновых загрузок (секунды, 0 - не выводить)
+        self.progress_interval = attachments_config.get('progress_log_interval', 30)
+        
+        # Политика повторов для временных ошибок
+        retry_config = attachments_config.get('retry', {})
+        self.retry_max_attempts = retry_config.get('max_attempts', 4)
+        self.retry_base_delay = retry_config.get('base_delay', 1.0)
+        self.retry_max_delay = retry_config.get('max_delay', 30.0)
+        
+        # Ограничение полосы (общее и на один хост)
+        bandwidth_config = attachments_config.get('bandwidth', {})
+        self.bandwidth = TokenBucket(bandwidth_config.get('max_bytes_per_sec'))
+        self.per_host_rate = bandwidth_config.get('per_host_bytes_per_sec')
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self.throughput = ThroughputMeter()
+        
         self.session: Optional[aiohttp.ClientSession] = None
         self.downloaded_count = 0
         self.failed_count = 0
+        self.retries_count = 0
+        self.failures_by_reason: Dict[str, int] = {}
         
     async def __aenter__(self):
         """Async context manager entry"""
-        self.session = aiohttp.ClientSession()
+        # Keep-alive соединения и кэш DNS для множества файлов с usrfiles.com
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrent,
+            limit_per_host=self.max_per_host,
+            ttl_dns_cache=300,
+            keepalive_timeout=30
+        )
+        self.session = aiohttp.ClientSession(connector=connector)
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
+        for worker in self._workers:
+            worker.cancel()
+        if self._workers:
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+        
         if self.session:
             await self.session.close()
+        self.manifest.close()
     
     def _get_file_extension(self, filename: str, url: str) -> str:
         """
-        Определение расширения файла
+        Определение заявленного расширения файла
+        
+        Имя файла - это текст ссылки ("Manual rev.3", "data.v2"), и его
+        "расширение" может быть случайным: тогда берется расширение из URL,
+        если оно разрешено.
         
         Args:
             filename: Имя файла
@@ -55,148 +162,497 @@ class AttachmentDownloader:
         Returns:
             Расширение файла с точкой
         """
-        # Попробовать извлечь из имени файла
-        if '.' in filename:
-            return '.' + filename.split('.')[-1].lower()
+        candidates = []
+        for name in (filename, urlparse(url).path):
+            if '.' in name:
+                candidates.append('.' + name.split('.')[-1].lower())
         
-        # Если не удалось, попробовать из URL
-        parsed = urlparse(url)
-        if '.' in parsed.path:
-            return '.' + parsed.path.split('.')[-1].lower()
+        for extension in candidates:
+            if self._is_allowed_type(extension):
+                return extension
         
-        return ''
+        return candidates[0] if candidates else ''
     
-    def _generate_safe_filename(self, original_filename: str, url: str) -> str:
+    def _is_allowed_type(self, extension: str) -> bool:
         """
-        Генерация безопасного имени файла
+        Проверка разрешенного расширения (с учетом синонимов .jpeg/.jpg)
         
         Args:
-            original_filename: Оригинальное имя файла
-            url: URL файла
+            extension: Расширение с точкой
             
         Returns:
-            Безопасное имя файла
+            True если расширение разрешено
         """
-        # Использовать хэш URL для уникальности
-        url_hash = hashlib.md5(url.encode()).hexdigest()[:8]
-        
-        # Очистить имя файла от специальных символов
-        safe_name = "".join(
-            c for c in original_filename 
-            if c.isalnum() or c in (' ', '.', '_', '-')
-        ).strip()
-        
-        # Если имя пустое, использовать хэш
-        if not safe_name or safe_name == '.':
-            ext = self._get_file_extension(original_filename, url)
-            safe_name = f"attachment_{url_hash}{ext}"
-        else:
-            # Добавить хэш к имени для уникальности
-            name_parts = safe_name.rsplit('.', 1)
-            if len(name_parts) == 2:
-                safe_name = f"{name_parts[0]}_{url_hash}.{name_parts[1]}"
-            else:
-                safe_name = f"{safe_name}_{url_hash}"
+        allowed = self.config['attachments']['allowed_extensions']
+        
+        # Если список пустой, разрешить все
+        if not allowed:
+            return True
         
-        return safe_name
+        return normalize_extension(extension) in {normalize_extension(ext) for ext in allowed}
     
-    def _is_allowed_extension(self, filename: str) -> bool:
+    def _check_content(
+        self,
+        head: bytes,
+        content_type: Optional[str],
+        declared_extension: str
+    ) -> Dict:
         """
-        Проверка разрешенного расширения файла
+        Проверка реального типа файла по первым байтам
         
         Args:
-            filename: Имя файла
+            head: Первые байты файла
+            content_type: Заголовок Content-Type
+            declared_extension: Расширение из имени файла или URL
             
         Returns:
-            True если расширение разрешено
+            Словарь с detected_type и detected_extension
+            
+        Raises:
+            DownloadError: Если вместо файла пришла HTML страница или тип запрещен
         """
-        allowed = self.config['attachments']['allowed_extensions']
+        detected = sniff_content(head, declared_extension)
         
-        # Если список пустой, разрешить все
-        if not allowed:
-            return True
+        if detected['is_html'] or (detected['mime'] is None and is_html_content_type(content_type)):
+            if not self._is_allowed_type('.html'):
+                raise DownloadError('html_response', retryable=True)
+        
+        elif detected['extension']:
+            if not self._is_allowed_type(detected['extension']):
+                raise DownloadError('disallowed_type')
+        
+        elif not declared_extension or not self._is_allowed_type(declared_extension):
+            raise DownloadError('unknown_type')
+        
+        return {
+            'detected_type': detected['mime'],
+            'detected_extension': detected['extension']
+        }
+    
+    async def _throttle(self, host: str, amount: int):
+        """Учет полученного блока в ограничениях полосы и статистике скорости"""
+        if self.per_host_rate:
+            bucket = self._host_buckets.setdefault(host, TokenBucket(self.per_host_rate))
+            await bucket.consume(amount)
         
-        ext = Path(filename).suffix.lower()
-        return ext in allowed
+        await self.bandwidth.consume(amount)
+        self.throughput.record(amount)
     
-    async def download_file(
-        self, 
-        url: str, 
+    @staticmethod
+    def _read_head(path: Path) -> bytes:
+        """Первые байты файла для определения типа"""
+        with open(path, 'rb') as f:
+            return f.read(SNIFF_SIZE)
+    
+    @staticmethod
+    def _load_part_meta(meta_path: Path, url: str) -> Optional[Dict]:
+        """
+        Загрузка метаданных частично скачанного файла
+        
+        Args:
+            meta_path: Путь к .part.json
+            url: URL файла (метаданные другого URL игнорируются)
+            
+        Returns:
+            Словарь с expected_size, etag, last_modified или None
+        """
+        if not meta_path.exists():
+            return None
+        
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        
+        return meta if meta.get('url') == url else None
+    
+    async def _stream_to_file(
+        self,
+        response: aiohttp.ClientResponse,
+        part_path: Path,
+        offset: int = 0,
+        declared_extension: str = ''
+    ) -> Optional[Dict]:
+        """
+        Потоковая запись ответа в .part файл
+        
+        Размер проверяется по мере получения данных, поэтому лимит
+        соблюдается и без заголовка Content-Length. Тип файла проверяется
+        по первым килобайтам, и HTML страницы ошибок или запрещенные типы
+        прерываются до скачивания остального. При обрыве соединения
+        .part файл сохраняется для последующего продолжения загрузки.
+        
+        Args:
+            response: Ответ сервера
+            part_path: Путь .part файла
+            offset: Количество уже скачанных байт (при продолжении)
+            declared_extension: Расширение из имени файла или URL
+            
+        Returns:
+            Словарь с size, sha256, detected_type, detected_extension
+            или None, если превышен лимит размера
+            
+        Raises:
+            DownloadError: Если тип содержимого не подходит
+        """
+        max_bytes = self.config['attachments']['max_file_size'] * 1024 * 1024
+        content_type = response.headers.get('Content-Type')
+        
+        if offset:
+            # Хэширование продолжается с уже скачанной части
+            sha256 = await asyncio.to_thread(update_sha256, hashlib.sha256(), part_path)
+            head = await asyncio.to_thread(self._read_head, part_path)
+        else:
+            sha256 = hashlib.sha256()
+            head = b''
+        size = offset
+        detected = None
+        host = response.url.host or ''
+        
+        f = await asyncio.to_thread(open, part_path, 'ab' if offset else 'wb')
+        try:
+            async for chunk in response.content.iter_chunked(self.chunk_size):
+                await self._throttle(host, len(chunk))
+                
+                if detected is None:
+                    head += chunk[:max(0, SNIFF_SIZE - len(head))]
+                    if len(head) >= SNIFF_SIZE:
+                        detected = self._check_content(head, content_type, declared_extension)
+                
+                size += len(chunk)
+                if size > max_bytes:
+                    break
+                
+                sha256.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+        
+        if size > max_bytes:
+            return None
+        
+        # Файл меньше SNIFF_SIZE
+        if detected is None:
+            detected = self._check_content(head, content_type, declared_extension)
+        
+        return {'size': size, 'sha256': sha256.hexdigest(), **detected}
+    
+    async def _download(
+        self,
+        url: str,
         filename: str,
         post_id: str = None
-    ) -> Optional[str]:
+    ) -> Optional[Dict]:
         """
-        Скачивание одного файла
+        Скачивание одного файла с метаданными
         
         Args:
             url: URL файла
             filename: Оригинальное имя файла
-            post_id: ID поста (для организации по папкам)
+            post_id: ID поста (для манифеста хранилища)
             
         Returns:
-            Путь к сохраненному файлу или None при ошибке
+            Словарь с local_path, size, sha256 или None при ошибке
         """
-        try:
-            # Проверить расширение
-            if not self._is_allowed_extension(filename):
-                logger.warning(f"Пропущен файл с неразрешенным расширением: {filename}")
-                return None
+        # Расширение в имени не проверяется заранее: решение принимается
+        # по содержимому файла (_check_content) после первых килобайт
+        lock = self._url_locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            if post_id is not None:
+                self.manifest.add_reference(post_id, filename, url)
             
-            # Генерировать безопасное имя файла
-            safe_filename = self._generate_safe_filename(filename, url)
+            entry = self.manifest.get(url)
             
-            # Определить путь сохранения
-            if post_id:
-                save_dir = self.download_dir / post_id
-                save_dir.mkdir(parents=True, exist_ok=True)
-            else:
-                save_dir = self.download_dir
+            if entry and entry['status'] == DownloadManifest.STATUS_FAILED and not entry['retryable']:
+                # Постоянная ошибка в прошлом запуске (404, 403, слишком большой файл)
+                logger.debug(f"Пропущен файл с постоянной ошибкой {entry['error']}: {url}")
+                return None
             
-            file_path = save_dir / safe_filename
+            if entry and entry['status'] == DownloadManifest.STATUS_OK:
+                # URL уже скачан (возможно, для другого поста)
+                local_path = self.store.blob_path(entry['sha256'], entry['extension'])
+                logger.debug(f"Файл уже в хранилище: {local_path}")
+                return {
+                    'local_path': str(local_path),
+                    'size': entry['size'],
+                    'sha256': entry['sha256'],
+                    'extension': entry['extension'],
+                    'detected_type': entry['detected_type'],
+                    'detected_extension': entry['extension'] if entry['detected_type'] else None
+                }
             
-            # Проверить, не скачан ли уже файл
-            if file_path.exists():
-                logger.debug(f"Файл уже существует: {file_path}")
-                return str(file_path)
+            return await self._fetch(url, filename)
+    
+    def _record_failure(self, url: str, error: DownloadError):
+        """Учет неудачной загрузки в счетчиках и манифесте"""
+        self.failed_count += 1
+        self.failures_by_reason[error.reason] = self.failures_by_reason.get(error.reason, 0) + 1
+        self.manifest.record_failure(
+            url, error.reason, error.http_status, retryable=error.retryable
+        )
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """Экспоненциальная задержка с полным джиттером"""
+        delay = min(self.retry_max_delay, self.retry_base_delay * (2 ** attempt))
+        return random.uniform(0, delay)
+    
+    async def _fetch(self, url: str, filename: str) -> Optional[Dict]:
+        """
+        Скачивание файла в хранилище с повторами при временных ошибках
+        
+        Таймауты, обрывы соединения, 5xx и 429 повторяются с экспоненциальной
+        задержкой, постоянные ошибки (404, 403, превышение размера) - нет.
+        
+        Args:
+            url: URL файла
+            filename: Оригинальное имя файла
             
-            # Скачать файл
-            async with self.session.get(url, timeout=aiohttp.ClientTimeout(total=60)) as response:
-                if response.status != 200:
-                    logger.error(f"Ошибка загрузки {url}: HTTP {response.status}")
-                    self.failed_count += 1
-                    return None
+        Returns:
+            Словарь с local_path, size, sha256, extension или None при ошибке
+        """
+        attempt = 0
+        
+        while True:
+            try:
+                return await self._fetch_once(url, filename)
+                
+            except asyncio.TimeoutError:
+                error = DownloadError('timeout', transient=True)
                 
-                # Проверить размер файла
-                content_length = response.headers.get('Content-Length')
-                if content_length:
-                    size_mb = int(content_length) / (1024 * 1024)
-                    max_size = self.config['attachments']['max_file_size']
-                    
-                    if size_mb > max_size:
-                        logger.warning(
-                            f"Файл слишком большой ({size_mb:.1f} MB): {filename}"
-                        )
-                        self.failed_count += 1
-                        return None
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+                error = DownloadError(f"connection_{type(e).__name__}", transient=True)
                 
-                # Сохранить файл
-                content = await response.read()
-                file_path.write_bytes(content)
+            except DownloadError as e:
+                error = e
                 
-                logger.debug(f"Скачан файл: {filename} → {file_path}")
-                self.downloaded_count += 1
+            except Exception as e:
+                logger.exception(f"Ошибка при загрузке {url}: {e}")
+                error = DownloadError(type(e).__name__, retryable=True)
+            
+            attempt += 1
+            
+            if not error.transient or attempt >= self.retry_max_attempts:
+                logger.error(f"Не удалось скачать {url}: {error.reason} (попыток: {attempt})")
+                self._record_failure(url, error)
+                return None
+            
+            delay = self._backoff_delay(attempt - 1)
+            logger.warning(
+                f"Временная ошибка {error.reason} при загрузке {url}, "
+                f"повтор {attempt}/{self.retry_max_attempts - 1} через {delay:.1f} с"
+            )
+            self.retries_count += 1
+            await asyncio.sleep(delay)
+    
+    async def _fetch_once(self, url: str, filename: str) -> Dict:
+        """
+        Одна попытка скачивания файла в хранилище
+        
+        Файл скачивается в .part с метаданными в .part.json (ожидаемый
+        размер, ETag). Прерванная загрузка продолжается Range-запросом,
+        а в хранилище файл попадает только после проверки длины.
+        
+        Ответ со сжатием (Content-Encoding) aiohttp распаковывает на лету,
+        а Content-Length и Range относятся к сжатым байтам: длина такого
+        ответа не проверяется, и загрузка не продолжается с места обрыва.
+        
+        Args:
+            url: URL файла
+            filename: Оригинальное имя файла
+            
+        Returns:
+            Словарь с local_path, size, sha256, extension
+            
+        Raises:
+            DownloadError: При ошибке загрузки
+        """
+        extension = self._get_file_extension(filename, url)
+        part_path, meta_path = self.store.temp_paths(url)
+        
+        # Продолжить прерванную загрузку, если есть .part и его метаданные
+        part_meta = self._load_part_meta(meta_path, url)
+        offset = part_path.stat().st_size if part_meta and part_path.exists() else 0
+        
+        headers = {}
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+            validator = part_meta.get('etag') or part_meta.get('last_modified')
+            if validator:
+                headers['If-Range'] = validator
+        
+        max_size = self.config['attachments']['max_file_size']
+        
+        async with self.session.get(url, headers=headers, timeout=self.timeout) as response:
+            encoded = response.headers.get('Content-Encoding', 'identity').lower() != 'identity'
+            
+            if offset and response.status == 206 and encoded:
+                # Диапазон сжатого представления нельзя дописать к распакованному .part
+                logger.warning(f"Сервер сжимает продолжение загрузки, загрузка с начала: {url}")
+                part_path.unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                raise DownloadError('encoded_range', response.status, transient=True)
+            
+            elif offset and response.status == 206:
+                # Сервер продолжает с нужного места
+                content_range = response.headers.get('Content-Range', '')
+                if not content_range.startswith(f"bytes {offset}-"):
+                    logger.error(f"Неожиданный Content-Range '{content_range}': {url}")
+                    part_path.unlink(missing_ok=True)
+                    meta_path.unlink(missing_ok=True)
+                    raise DownloadError('bad_content_range', response.status, transient=True)
                 
-                return str(file_path)
+                total = content_range.rsplit('/', 1)[-1]
+                if total.isdigit():
+                    part_meta['expected_size'] = int(total)
+                logger.debug(f"Продолжение загрузки с {offset} байт: {filename}")
+            
+            elif offset and response.status == 416 and part_meta.get('expected_size') == offset:
+                # .part уже содержит весь файл
+                logger.debug(f"Файл уже скачан полностью: {part_path}")
+                head = await asyncio.to_thread(self._read_head, part_path)
+                info = {
+                    'size': offset,
+                    'sha256': await asyncio.to_thread(sha256_file, part_path),
+                    **self._check_content(head, None, extension)
+                }
+                return self._promote_part(url, part_path, meta_path, extension, info)
+            
+            elif offset and response.status == 416:
+                # Размер неизвестен или не совпадает: .part не проверить,
+                # следующая попытка скачает файл с начала
+                logger.warning(f"Сервер отклонил Range с {offset} байт, загрузка с начала: {url}")
+                part_path.unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                raise DownloadError('range_not_satisfiable', response.status, transient=True)
+            
+            elif response.status == 200:
+                # Загрузка с начала (в т.ч. если файл на сервере изменился)
+                offset = 0
+                # Content-Length сжатого ответа - не размер распакованного файла
+                content_length = None if encoded else response.headers.get('Content-Length')
+                part_meta = {
+                    'url': url,
+                    'expected_size': int(content_length) if content_length else None,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified')
+                }
+            
+            else:
+                raise DownloadError(
+                    f"http_{response.status}",
+                    response.status,
+                    transient=response.status in TRANSIENT_HTTP_STATUSES
+                )
+            
+            if offset == 0:
+                part_path.unlink(missing_ok=True)
+            
+            # HTML вместо файла можно отсечь по заголовку, не читая тело
+            content_type = response.headers.get('Content-Type')
+            if is_html_content_type(content_type) and not self._is_allowed_type('.html'):
+                logger.warning(f"Сервер вернул HTML страницу вместо файла: {url}")
+                meta_path.unlink(missing_ok=True)
+                raise DownloadError('html_response', response.status, retryable=True)
+            
+            # Проверить размер файла заранее, если сервер его сообщил
+            expected_size = part_meta.get('expected_size')
+            if expected_size:
+                size_mb = expected_size / (1024 * 1024)
                 
-        except asyncio.TimeoutError:
-            logger.error(f"Таймаут при загрузке: {url}")
-            self.failed_count += 1
-            return None
+                if size_mb > max_size:
+                    logger.warning(
+                        f"Файл слишком большой ({size_mb:.1f} MB): {filename}"
+                    )
+                    raise DownloadError('too_large', response.status)
             
-        except Exception as e:
-            logger.exception(f"Ошибка при загрузке {url}: {e}")
-            self.failed_count += 1
-            return None
+            # Без метаданных прерванная загрузка сжатого ответа начнется заново
+            if not encoded:
+                meta_path.write_text(json.dumps(part_meta), encoding='utf-8')
+            
+            # Сохранить файл потоково
+            try:
+                info = await self._stream_to_file(response, part_path, offset, extension)
+            except DownloadError as e:
+                logger.warning(
+                    f"Загрузка прервана, неподходящее содержимое ({e.reason}): {filename}"
+                )
+                part_path.unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                e.http_status = response.status
+                raise
+            
+            if info is None:
+                logger.warning(
+                    f"Файл превысил лимит {max_size} MB при загрузке: {filename}"
+                )
+                part_path.unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                raise DownloadError('too_large', response.status)
+            
+            # Проверить длину перед переносом в хранилище
+            if expected_size is not None and info['size'] != expected_size:
+                logger.error(
+                    f"Размер не совпадает ({info['size']} из {expected_size} байт): {url}"
+                )
+                part_path.unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                raise DownloadError('size_mismatch', response.status, transient=True)
+            
+            info['content_type'] = content_type
+            info['http_status'] = response.status
+            return self._promote_part(
+                url, part_path, meta_path,
+                info['detected_extension'] or extension, info
+            )
+    
+    def _promote_part(
+        self,
+        url: str,
+        part_path: Path,
+        meta_path: Path,
+        extension: str,
+        info: Dict
+    ) -> Dict:
+        """Перенос проверенного .part в хранилище и запись в манифест"""
+        file_path = self.store.commit(part_path, info['sha256'], extension)
+        meta_path.unlink(missing_ok=True)
+        
+        self.manifest.record_success(
+            url,
+            sha256=info['sha256'],
+            size=info['size'],
+            extension=extension,
+            content_type=info.get('content_type'),
+            detected_type=info.get('detected_type'),
+            http_status=info.get('http_status')
+        )
+        
+        logger.debug(f"Скачан файл: {file_path}")
+        self.downloaded_count += 1
+        
+        info['extension'] = extension
+        info['local_path'] = str(file_path)
+        return info
+    
+    async def download_file(
+        self, 
+        url: str, 
+        filename: str,
+        post_id: str = None
+    ) -> Optional[str]:
+        """
+        Скачивание одного файла
+        
+        Args:
+            url: URL файла
+            filename: Оригинальное имя файла
+            post_id: ID поста (для манифеста хранилища)
+            
+        Returns:
+            Путь к сохраненному файлу или None при ошибке
+        """
+        info = await self._download(url, filename, post_id)
+        return info['local_path'] if info else None
     
     async def download_attachments(
         self,
@@ -218,30 +674,124 @@ class AttachmentDownloader:
         if not attachments:
             return []
         
-        iterator = tqdm(attachments, desc="Скачивание вложений") if show_progress else attachments
-        
-        updated_attachments = []
+        progress = tqdm(total=len(attachments), desc="Скачивание вложений") if show_progress else None
         
-        for attachment in iterator:
+        async def download_one(attachment: Dict) -> Optional[Dict]:
             url = attachment.get('url')
             filename = attachment.get('filename', 'unknown')
             
             if not url:
                 logger.warning(f"Пропущено вложение без URL: {filename}")
-                continue
+                return None
             
-            local_path = await self.download_file(url, filename, post_id)
+            async with self._semaphore:
+                info = await self._download(url, filename, post_id)
             
             # Обновить данные вложения
-            attachment['downloaded'] = local_path is not None
-            attachment['local_path'] = local_path
+            attachment['downloaded'] = info is not None
+            attachment['local_path'] = info['local_path'] if info else None
+            
+            if info:
+                attachment['size'] = info['size']
+                attachment['sha256'] = info['sha256']
+                attachment['detected_type'] = info.get('detected_type')
+                attachment['detected_extension'] = info.get('detected_extension')
             
-            updated_attachments.append(attachment)
+            if progress:
+                progress.update(1)
             
-            # Небольшая задержка между загрузками
-            await asyncio.sleep(0.5)
+            return attachment
+        
+        try:
+            # Параллельная загрузка, порядок результатов совпадает с исходным
+            results = await asyncio.gather(
+                *(download_one(attachment) for attachment in attachments)
+            )
+        finally:
+            if progress:
+                progress.close()
+        
+        return [attachment for attachment in results if attachment is not None]
+    
+    def start_workers(self):
+        """Запуск фоновых обработчиков очереди загрузок"""
+        if self._workers:
+            return
+        
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.queue_workers)
+        ]
+        
+        # Отчет о прогрессе останавливается вместе с обработчиками
+        if self.progress_interval:
+            self._workers.append(asyncio.create_task(self._progress_reporter()))
         
-        return updated_attachments
+        logger.debug(f"Запущено обработчиков очереди загрузок: {self.queue_workers}")
+    
+    async def enqueue(self, post: Dict):
+        """
+        Поставить вложения поста в фоновую очередь
+        
+        Если очередь заполнена, ожидает освобождения места.
+        По завершении задания post['attachments'] обновляется результатами.
+        
+        Args:
+            post: Пост с вложениями
+        """
+        if not post.get('attachments'):
+            return
+        
+        if not self._workers:
+            self.start_workers()
+        
+        await self._queue.put(post)
+    
+    async def drain(self):
+        """Дождаться завершения всех заданий очереди и остановить обработчики"""
+        if not self._workers:
+            return
+        
+        await self._queue.join()
+        
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    async def _worker(self):
+        """Обработчик очереди загрузок"""
+        while True:
+            post = await self._queue.get()
+            try:
+                post['attachments'] = await self.download_attachments(
+                    post['attachments'],
+                    post_id=post['id'],
+                    show_progress=False
+                )
+            except Exception as e:
+                logger.exception(f"Ошибка при загрузке вложений поста {post.get('id')}: {e}")
+            finally:
+                self._queue.task_done()
+    
+    async def _progress_reporter(self):
+        """Периодический вывод прогресса фоновых загрузок"""
+        reported = None
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            
+            # Без новых данных строка не повторяется
+            current = (self.downloaded_count, self.failed_count, self.throughput.total)
+            if current == reported:
+                continue
+            reported = current
+            
+            logger.info(
+                f"📎 Загрузки: скачано {self.downloaded_count}, ошибок {self.failed_count}, "
+                f"повторов {self.retries_count}, в очереди {self._queue.qsize()} постов, "
+                f"скорость {self.throughput.rate() / (1024 * 1024):.2f} MB/s"
+            )
     
     def get_stats(self) -> Dict:
         """
@@ -253,8 +803,34 @@ class AttachmentDownloader:
         return {
             'downloaded': self.downloaded_count,
             'failed': self.failed_count,
-            'total': self.downloaded_count + self.failed_count
+            'total': self.downloaded_count + self.failed_count,
+            'retries': self.retries_count,
+            'bytes_received': self.throughput.total,
+            'throughput_bytes_per_sec': round(self.throughput.rate()),
+            'average_bytes_per_sec': round(self.throughput.average()),
+            'failures_by_reason': dict(self.failures_by_reason),
+            'manifest': self.manifest.summary()
         }
+    
+    async def retry_failed(self) -> int:
+        """
+        Повторная загрузка неудачных файлов из манифеста
+        
+        Файлы с постоянными ошибками (404, 403, превышение размера) пропускаются.
+        
+        Returns:
+            Количество успешно скачанных файлов
+        """
+        failed = self.manifest.failed(retryable_only=True)
+        logger.info(f"Повторная загрузка неудачных файлов: {len(failed)}")
+        
+        async def retry_one(entry: Dict) -> bool:
+            async with self._semaphore:
+                info = await self._download(entry['url'], entry['filename'] or '')
+            return info is not None
+        
+        results = await asyncio.gather(*(retry_one(entry) for entry in failed))
+        return sum(results)
 
 
 async def test_download():
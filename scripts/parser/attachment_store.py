@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Хранилище вложений с адресацией по содержимому (SHA-256)
+"""
+
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Размер блока при потоковом хэшировании файлов
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def update_sha256(sha256, path: Path):
+    """
+    Дописать содержимое файла в хэш (потоково)
+
+    Args:
+        sha256: Объект hashlib.sha256 (например, уже скачанной части файла)
+        path: Путь к файлу
+
+    Returns:
+        Тот же объект sha256
+    """
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            sha256.update(block)
+    return sha256
+
+
+def sha256_file(path: Path) -> str:
+    """SHA-256 содержимого файла (hex)"""
+    return update_sha256(hashlib.sha256(), path).hexdigest()
+
+
+class AttachmentStore:
+    """
+    Хранилище файлов по SHA-256 содержимого
+
+    Файлы лежат в blobs/ab/cd/<sha256><ext>, одинаковое содержимое
+    хранится один раз. Связь (пост, оригинальное имя, URL) с файлом
+    хранилища ведется в манифесте загрузок (DownloadManifest).
+    """
+
+    def __init__(self, root_dir: str, fan_out: int = 2):
+        """
+        Инициализация хранилища
+
+        Args:
+            root_dir: Корневая директория вложений
+            fan_out: Количество уровней вложенных директорий (по 2 символа хэша)
+        """
+        self.root_dir = Path(root_dir)
+        self.blobs_dir = self.root_dir / 'blobs'
+        self.tmp_dir = self.root_dir / 'tmp'
+        self.fan_out = fan_out
+
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    def blob_path(self, sha256: str, extension: str = '') -> Path:
+        """
+        Путь файла в хранилище
+
+        Args:
+            sha256: SHA-256 содержимого
+            extension: Расширение файла с точкой
+
+        Returns:
+            Путь вида blobs/ab/cd/<sha256><ext>
+        """
+        shards = [sha256[i * 2:i * 2 + 2] for i in range(self.fan_out)]
+        return self.blobs_dir.joinpath(*shards, f"{sha256}{extension}")
+
+    def temp_paths(self, url: str) -> Tuple[Path, Path]:
+        """
+        Пути .part файла и его метаданных для URL
+
+        Args:
+            url: URL файла
+
+        Returns:
+            (путь .part, путь .part.json)
+        """
+        url_hash = hashlib.sha256(url.encode()).hexdigest()
+        return (
+            self.tmp_dir / f"{url_hash}.part",
+            self.tmp_dir / f"{url_hash}.part.json"
+        )
+
+    def commit(self, temp_path: Path, sha256: str, extension: str = '') -> Path:
+        """
+        Перенести скачанный файл в хранилище
+
+        Если файл с таким содержимым уже есть, временный файл удаляется.
+
+        Args:
+            temp_path: Путь скачанного файла
+            sha256: SHA-256 содержимого
+            extension: Расширение файла с точкой
+
+        Returns:
+            Путь файла в хранилище
+        """
+        path = self.blob_path(sha256, extension)
+
+        if path.exists():
+            logger.debug(f"Дубликат содержимого, файл уже в хранилище: {path}")
+            temp_path.unlink(missing_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, path)
+
+        return path
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Проверка целостности скачанных вложений по экспорту и манифесту загрузок
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from tqdm import tqdm
+
+from .attachment_store import AttachmentStore, sha256_file
+from .download_manifest import DownloadManifest
+from .export_reader import RECORD_POST, iter_export
+
+logger = logging.getLogger(__name__)
+
+
+def hash_file(path: str) -> Tuple[str, Optional[str]]:
+    """
+    SHA-256 файла (выполняется в отдельном процессе)
+
+    Args:
+        path: Путь к файлу
+
+    Returns:
+        (путь, sha256) или (путь, None) при ошибке чтения
+    """
+    try:
+        return path, sha256_file(path)
+    except OSError:
+        return path, None
+
+
+class AttachmentVerifier:
+    """Проверка наличия, размера и хэша вложений из экспорта"""
+
+    def __init__(self, config: Dict, workers: Optional[int] = None):
+        """
+        Инициализация проверки
+
+        Args:
+            config: Конфигурация из wix_config.yaml
+            workers: Количество процессов для хэширования (по умолчанию - по числу CPU)
+        """
+        self.config = config
+        self.workers = workers or os.cpu_count()
+        self.store = AttachmentStore(config['attachments']['download_dir'])
+
+        manifest_path = Path(config['attachments']['download_dir']) / 'manifest.db'
+        self.manifest = DownloadManifest(str(manifest_path))
+
+    def close(self):
+        """Закрыть манифест"""
+        self.manifest.close()
+
+    @staticmethod
+    def _iter_attachments(export_file: str) -> Iterator[Tuple[str, Dict]]:
+        """Все вложения экспорта с ID постов"""
+        for record_type, post in iter_export(export_file):
+            if record_type != RECORD_POST:
+                continue
+
+            for attachment in post.get('attachments', []):
+                yield post.get('id'), attachment
+
+    def _expected(self, attachment: Dict, path: Path) -> Tuple[Optional[int], Optional[str]]:
+        """Ожидаемые размер и хэш: манифест, затем данные экспорта, затем имя файла"""
+        entry = self.manifest.get(attachment.get('url'))
+
+        if entry and entry['status'] == DownloadManifest.STATUS_OK:
+            return entry['size'], entry['sha256']
+
+        sha256 = attachment.get('sha256')
+        if not sha256 and path.parent.is_relative_to(self.store.blobs_dir):
+            sha256 = path.name.split('.', 1)[0]
+
+        return attachment.get('size'), sha256
+
+    def verify(self, export_file: str) -> Dict:
+        """
+        Проверка вложений экспорта
+
+        Args:
+            export_file: Путь к forum_structure_*.json (или .jsonl)
+
+        Returns:
+            Отчет: счетчики и списки missing, corrupt, not_downloaded, orphaned
+        """
+        report = {
+            'export_file': export_file,
+            'checked': 0,
+            'ok': 0,
+            'missing': [],
+            'corrupt': [],
+            'not_downloaded': [],
+            'orphaned': [],
+        }
+
+        # Путь файла → (ожидаемый хэш, ссылки вложений); общие файлы хэшируются один раз
+        to_hash: Dict[str, Dict] = {}
+        referenced = set()
+
+        for post_id, attachment in self._iter_attachments(export_file):
+            report['checked'] += 1
+            item = {
+                'post_id': post_id,
+                'filename': attachment.get('filename'),
+                'url': attachment.get('url'),
+                'local_path': attachment.get('local_path'),
+            }
+
+            if not attachment.get('local_path'):
+                report['not_downloaded'].append(item)
+                continue
+
+            path = Path(attachment['local_path'])
+            referenced.add(path.resolve())
+
+            if not path.exists():
+                report['missing'].append(item)
+                continue
+
+            expected_size, expected_sha = self._expected(attachment, path)
+            actual_size = path.stat().st_size
+
+            if expected_size is not None and actual_size != expected_size:
+                report['corrupt'].append({
+                    **item,
+                    'reason': f"size {actual_size} != {expected_size}"
+                })
+                continue
+
+            if not expected_sha:
+                report['ok'] += 1
+                continue
+
+            entry = to_hash.setdefault(str(path), {'sha256': expected_sha, 'items': []})
+            entry['items'].append(item)
+
+        # Хэширование в пуле процессов
+        if to_hash:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                results = pool.map(hash_file, list(to_hash), chunksize=8)
+
+                for path, actual_sha in tqdm(results, total=len(to_hash), desc="Проверка хэшей"):
+                    entry = to_hash[path]
+
+                    if actual_sha == entry['sha256']:
+                        report['ok'] += len(entry['items'])
+                        continue
+
+                    reason = 'read error' if actual_sha is None else 'sha256 mismatch'
+                    report['corrupt'].extend(
+                        {**item, 'reason': reason} for item in entry['items']
+                    )
+
+        # Файлы хранилища, на которые не ссылается экспорт
+        for path in self.store.blobs_dir.rglob('*'):
+            if path.is_file() and path.resolve() not in referenced:
+                report['orphaned'].append(str(path))
+
+        return report
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Определение реального типа файла по сигнатурам (magic numbers)
+"""
+
+from typing import Dict, Optional
+
+
+# Сколько первых байт нужно для определения типа
+SNIFF_SIZE = 4096
+
+# (сигнатура, смещение, MIME тип, расширение)
+MAGIC_SIGNATURES = [
+    (b'%PDF-', 0, 'application/pdf', '.pdf'),
+    (b'\x89PNG\r\n\x1a\n', 0, 'image/png', '.png'),
+    (b'\xff\xd8\xff', 0, 'image/jpeg', '.jpg'),
+    (b'GIF87a', 0, 'image/gif', '.gif'),
+    (b'GIF89a', 0, 'image/gif', '.gif'),
+    (b'WEBP', 8, 'image/webp', '.webp'),
+    (b'II*\x00', 0, 'image/tiff', '.tif'),
+    (b'MM\x00*', 0, 'image/tiff', '.tif'),
+    (b'{\\rtf', 0, 'application/rtf', '.rtf'),
+    (b'Rar!\x1a\x07', 0, 'application/vnd.rar', '.rar'),
+    (b'7z\xbc\xaf\x27\x1c', 0, 'application/x-7z-compressed', '.7z'),
+    (b'\x1f\x8b', 0, 'application/gzip', '.gz'),
+]
+
+# BMP: "BM", размер, 4 нулевых байта, смещение данных, размер DIB заголовка
+BMP_SIGNATURE = b'BM'
+BMP_DIB_HEADER_SIZES = (12, 40, 52, 56, 64, 108, 124)
+
+# Документы Office Open XML - ZIP архивы, различаются по содержимому.
+# Каталоги word/, xl/, ppt/ могут оказаться дальше SNIFF_SIZE (например,
+# после большого [Content_Types].xml), тогда тип берется из расширения
+ZIP_SIGNATURE = b'PK\x03\x04'
+OOXML_MARKERS = [
+    (b'word/', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document', '.docx'),
+    (b'xl/', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '.xlsx'),
+    (b'ppt/', 'application/vnd.openxmlformats-officedocument.presentationml.presentation', '.pptx'),
+]
+
+# Текстовые форматы без сигнатуры: начало файла может случайно совпасть
+# с короткой сигнатурой, поэтому для них учитывается расширение
+TEXT_EXTENSIONS = ('.txt', '.csv', '.log', '.md', '.json', '.xml')
+TEXT_CONTROL_BYTES = bytes(set(range(32)) - {9, 10, 12, 13})
+WEAK_SIGNATURE_LENGTH = 3
+
+# Старые форматы Office (OLE2) - тип по сигнатуре не различить
+OLE2_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+OLE2_EXTENSIONS = ('.doc', '.xls', '.ppt', '.msg')
+
+HTML_MARKERS = (b'<!doctype html', b'<html', b'<head', b'<body')
+
+# Синонимы расширений
+EXTENSION_ALIASES = {
+    '.jpeg': '.jpg',
+    '.jpe': '.jpg',
+    '.tiff': '.tif',
+}
+
+
+def normalize_extension(extension: str) -> str:
+    """
+    Приведение расширения к каноническому виду
+
+    Args:
+        extension: Расширение с точкой
+
+    Returns:
+        Расширение в нижнем регистре с учетом синонимов (.jpeg → .jpg)
+    """
+    extension = extension.lower()
+    return EXTENSION_ALIASES.get(extension, extension)
+
+
+def is_html_content_type(content_type: Optional[str]) -> bool:
+    """Проверка, что Content-Type указывает на HTML страницу"""
+    if not content_type:
+        return False
+    return content_type.split(';')[0].strip().lower() in ('text/html', 'application/xhtml+xml')
+
+
+def _is_bmp(head: bytes) -> bool:
+    """Проверка заголовка BMP (одних байт "BM" недостаточно: так начинается и текст)"""
+    if not head.startswith(BMP_SIGNATURE) or len(head) < 18 or head[6:10] != b'\x00' * 4:
+        return False
+    return int.from_bytes(head[14:18], 'little') in BMP_DIB_HEADER_SIZES
+
+
+def _looks_like_text(head: bytes) -> bool:
+    """Нет нулевых и управляющих байт (кроме табуляции и переводов строк)"""
+    return not any(byte in TEXT_CONTROL_BYTES for byte in head)
+
+
+def sniff_content(head: bytes, declared_extension: str = '') -> Dict:
+    """
+    Определение типа файла по первым байтам
+
+    Args:
+        head: Первые байты файла (желательно SNIFF_SIZE)
+        declared_extension: Расширение из имени файла (для неоднозначных форматов)
+
+    Returns:
+        Словарь {'mime', 'extension', 'is_html'}; mime и extension равны None,
+        если тип не определен
+    """
+    result = {'mime': None, 'extension': None, 'is_html': False}
+    declared = normalize_extension(declared_extension)
+
+    for signature, offset, mime, extension in MAGIC_SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            # Короткая сигнатура в начале текстового файла - совпадение
+            weak = offset + len(signature) <= WEAK_SIGNATURE_LENGTH
+            if weak and declared in TEXT_EXTENSIONS and _looks_like_text(head):
+                break
+            result.update(mime=mime, extension=extension)
+            return result
+
+    if _is_bmp(head):
+        result.update(mime='image/bmp', extension='.bmp')
+        return result
+
+    if head.startswith(ZIP_SIGNATURE):
+        for marker, mime, extension in OOXML_MARKERS:
+            if marker in head:
+                result.update(mime=mime, extension=extension)
+                return result
+
+        for _, mime, extension in OOXML_MARKERS:
+            if declared == extension:
+                result.update(mime=mime, extension=extension)
+                return result
+
+        result.update(mime='application/zip', extension='.zip')
+        return result
+
+    if head.startswith(OLE2_SIGNATURE):
+        declared = normalize_extension(declared_extension)
+        extension = declared if declared in OLE2_EXTENSIONS else '.doc'
+        result.update(mime='application/x-ole-storage', extension=extension)
+        return result
+
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if text.startswith(HTML_MARKERS) or b'<html' in text[:512]:
+        result.update(mime='text/html', extension='.html', is_html=True)
+
+    return result
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Планировщик детального парсинга постов по приоритетам
+"""
+
+import heapq
+import itertools
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .utils import extract_numbers_from_text, parse_date
+
+logger = logging.getLogger(__name__)
+
+
+# Политика возвращает ключ сортировки: меньший ключ обрабатывается раньше
+PolicyFunc = Callable[[Dict, Dict], Tuple]
+
+
+def _policy_order(job: Dict, config: Dict) -> Tuple:
+    """Порядок появления на странице"""
+    return ()
+
+
+def _policy_newest(job: Dict, config: Dict) -> Tuple:
+    """Сначала самые новые посты (посты без даты - в конце)"""
+    created_at = parse_date(job['post'].get('created_at', ''))
+    if not created_at:
+        return (1, 0.0)
+    return (0, -created_at.timestamp())
+
+
+def _policy_most_comments(job: Dict, config: Dict) -> Tuple:
+    """Сначала посты с наибольшим количеством комментариев"""
+    numbers = extract_numbers_from_text(str(job['post'].get('comments_count', '')))
+    return (-numbers[0] if numbers else 0,)
+
+
+def _policy_category_priority(job: Dict, config: Dict) -> Tuple:
+    """Явный список приоритетных категорий/подкатегорий из конфигурации"""
+    priority = config.get('category_priority') or []
+
+    for title in (job['category'].get('title'), job['subcategory'].get('title')):
+        if title in priority:
+            return (priority.index(title),)
+
+    return (len(priority),)
+
+
+POLICIES: Dict[str, PolicyFunc] = {
+    'order': _policy_order,
+    'newest': _policy_newest,
+    'most_comments': _policy_most_comments,
+    'category_priority': _policy_category_priority,
+}
+
+
+def register_policy(name: str, func: PolicyFunc):
+    """
+    Регистрация пользовательской политики приоритетов
+
+    Args:
+        name: Имя политики (используется в scheduling.policy)
+        func: Функция (job, scheduling_config) -> ключ сортировки
+    """
+    POLICIES[name] = func
+
+
+class CrawlScheduler:
+    """Очередь детального парсинга постов с приоритетами"""
+
+    def __init__(self, config: Dict):
+        """
+        Инициализация планировщика
+
+        Args:
+            config: Секция scheduling из wix_config.yaml
+        """
+        self.config = config or {}
+
+        policy = self.config.get('policy', 'order')
+        self.policy_names: List[str] = [policy] if isinstance(policy, str) else list(policy)
+
+        unknown = [name for name in self.policy_names if name not in POLICIES]
+        if unknown:
+            raise ValueError(f"Неизвестные политики планирования: {unknown}")
+
+        self.max_posts: Optional[int] = self.config.get('max_posts')
+
+        time_limit = self.config.get('time_limit_minutes')
+        self.deadline: Optional[float] = (
+            time.monotonic() + time_limit * 60 if time_limit else None
+        )
+
+        self._heap: List[Tuple] = []
+        self._counter = itertools.count()
+        self.dispatched = 0
+
+    def _priority(self, job: Dict) -> Tuple:
+        """Составной ключ из всех выбранных политик"""
+        return tuple(
+            POLICIES[name](job, self.config) for name in self.policy_names
+        )
+
+    def push(self, post: Dict, category: Dict, subcategory: Dict):
+        """
+        Добавить пост в очередь
+
+        Args:
+            post: Пост (с базовой информацией со страницы списка)
+            category: Категория поста
+            subcategory: Подкатегория поста
+        """
+        job = {'post': post, 'category': category, 'subcategory': subcategory}
+        # Счетчик сохраняет порядок появления для равных приоритетов
+        heapq.heappush(self._heap, (self._priority(job), next(self._counter), job))
+
+    def pop(self) -> Optional[Dict]:
+        """
+        Получить следующий пост для обработки
+
+        Returns:
+            Задание {'post', 'category', 'subcategory'} или None,
+            если очередь пуста или исчерпан лимит постов/времени
+        """
+        if not self._heap or self.exhausted():
+            return None
+
+        _, _, job = heapq.heappop(self._heap)
+        self.dispatched += 1
+        return job
+
+    def exhausted(self) -> bool:
+        """Проверка исчерпания лимитов по количеству постов и времени"""
+        if self.max_posts is not None and self.dispatched >= self.max_posts:
+            return True
+
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+
+        return False
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __iter__(self):
+        while True:
+            job = self.pop()
+            if job is None:
+                if self._heap:
+                    logger.warning(
+                        f"Достигнут лимит планировщика, не обработано постов: {len(self._heap)}"
+                    )
+                return
+            yield job
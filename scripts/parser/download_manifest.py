@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Манифест загрузок вложений (SQLite)
+"""
+
+import logging
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    url TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    sha256 TEXT,
+    size INTEGER,
+    content_type TEXT,
+    detected_type TEXT,
+    extension TEXT,
+    http_status INTEGER,
+    error TEXT,
+    retryable INTEGER NOT NULL DEFAULT 1,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    first_seen TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS refs (
+    post_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (post_id, filename, url)
+);
+
+CREATE INDEX IF NOT EXISTS idx_downloads_status ON downloads (status);
+CREATE INDEX IF NOT EXISTS idx_refs_url ON refs (url);
+"""
+
+
+class DownloadManifest:
+    """
+    Персистентный манифест загрузок по URL
+
+    Все записи загружаются в память при открытии, поэтому решения
+    "скачивать или нет" не требуют обращений к диску.
+    """
+
+    STATUS_OK = 'ok'
+    STATUS_FAILED = 'failed'
+
+    def __init__(self, db_path: str):
+        """
+        Открытие манифеста
+
+        Args:
+            db_path: Путь к файлу SQLite
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+        self.entries: Dict[str, Dict] = {
+            row['url']: dict(row)
+            for row in self.conn.execute("SELECT * FROM downloads")
+        }
+
+        logger.debug(f"Загружено записей манифеста загрузок: {len(self.entries)}")
+
+    def close(self):
+        """Закрыть соединение с базой"""
+        self.conn.close()
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        Запись манифеста по URL
+
+        Args:
+            url: URL файла
+
+        Returns:
+            Словарь с полями записи или None
+        """
+        return self.entries.get(url)
+
+    def _upsert(self, url: str, **fields) -> Dict:
+        """Создать или обновить запись и ее копию в памяти"""
+        now = datetime.now().isoformat()
+        previous = self.entries.get(url)
+
+        entry = {
+            'url': url,
+            'status': None,
+            'sha256': None,
+            'size': None,
+            'content_type': None,
+            'detected_type': None,
+            'extension': None,
+            'http_status': None,
+            'error': None,
+            'retryable': 1,
+            'attempts': (previous['attempts'] if previous else 0) + 1,
+            'first_seen': previous['first_seen'] if previous else now,
+            'updated_at': now,
+        }
+        entry.update(fields)
+
+        columns = ', '.join(entry)
+        placeholders = ', '.join('?' for _ in entry)
+
+        with self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO downloads ({columns}) VALUES ({placeholders})",
+                tuple(entry.values())
+            )
+
+        self.entries[url] = entry
+        return entry
+
+    def record_success(
+        self,
+        url: str,
+        sha256: str,
+        size: int,
+        extension: str = '',
+        content_type: Optional[str] = None,
+        detected_type: Optional[str] = None,
+        http_status: Optional[int] = None
+    ) -> Dict:
+        """
+        Записать успешную загрузку
+
+        Args:
+            url: URL файла
+            sha256: SHA-256 содержимого
+            size: Размер в байтах
+            extension: Расширение файла с точкой
+            content_type: Заголовок Content-Type
+            detected_type: Тип, определенный по содержимому
+            http_status: HTTP статус ответа
+
+        Returns:
+            Запись манифеста
+        """
+        return self._upsert(
+            url,
+            status=self.STATUS_OK,
+            sha256=sha256,
+            size=size,
+            extension=extension,
+            content_type=content_type,
+            detected_type=detected_type,
+            http_status=http_status
+        )
+
+    def record_failure(
+        self,
+        url: str,
+        error: str,
+        http_status: Optional[int] = None,
+        retryable: bool = True
+    ) -> Dict:
+        """
+        Записать неудачную загрузку
+
+        Args:
+            url: URL файла
+            error: Причина ошибки
+            http_status: HTTP статус ответа (если был)
+            retryable: Имеет ли смысл повторять загрузку при следующем запуске
+
+        Returns:
+            Запись манифеста
+        """
+        return self._upsert(
+            url,
+            status=self.STATUS_FAILED,
+            error=error,
+            http_status=http_status,
+            retryable=int(retryable)
+        )
+
+    def add_reference(self, post_id: Optional[str], filename: str, url: str):
+        """
+        Связать вложение поста с URL
+
+        Args:
+            post_id: ID поста
+            filename: Оригинальное имя файла
+            url: URL файла
+        """
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO refs (post_id, filename, url) VALUES (?, ?, ?)",
+                (post_id or '', filename, url)
+            )
+
+    def failed(self, retryable_only: bool = False) -> List[Dict]:
+        """
+        Неудачные загрузки с именами файлов из ссылок постов
+
+        Args:
+            retryable_only: Только ошибки, которые имеет смысл повторять
+
+        Returns:
+            Список записей с дополнительным полем filename
+        """
+        rows = self.conn.execute(
+            """SELECT d.*, MIN(r.filename) AS filename
+               FROM downloads d LEFT JOIN refs r ON r.url = d.url
+               WHERE d.status = ? AND (d.retryable = 1 OR ? = 0)
+               GROUP BY d.url
+               ORDER BY d.updated_at""",
+            (self.STATUS_FAILED, int(retryable_only))
+        )
+        return [dict(row) for row in rows]
+
+    def summary(self) -> Dict:
+        """
+        Сводка по манифесту
+
+        Returns:
+            Словарь с количеством и объемом загрузок и ошибками по причинам
+        """
+        summary = {'by_status': {}, 'errors': {}, 'total_bytes': 0, 'references': 0}
+
+        for row in self.conn.execute(
+            "SELECT status, COUNT(*) AS count, COALESCE(SUM(size), 0) AS bytes "
+            "FROM downloads GROUP BY status"
+        ):
+            summary['by_status'][row['status']] = row['count']
+            summary['total_bytes'] += row['bytes']
+
+        for row in self.conn.execute(
+            "SELECT error, COUNT(*) AS count FROM downloads "
+            "WHERE status = ? GROUP BY error ORDER BY count DESC",
+            (self.STATUS_FAILED,)
+        ):
+            summary['errors'][row['error']] = row['count']
+
+        summary['references'] = self.conn.execute(
+            "SELECT COUNT(*) FROM refs"
+        ).fetchone()[0]
+
+        return summary
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Потоковое чтение экспорта форума (forum_structure_*.json / *.jsonl)
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+try:
+    import ijson
+except ImportError:  # ijson - необязательная зависимость
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+
+# Типы записей экспорта
+RECORD_CATEGORY = 'category'
+RECORD_SUBCATEGORY = 'subcategory'
+RECORD_POST = 'post'
+
+# Вложенные списки, которые не входят в записи категорий и подкатегорий
+CHILD_KEYS = {
+    RECORD_CATEGORY: 'subcategories',
+    RECORD_SUBCATEGORY: 'posts',
+}
+
+_CATEGORY_PREFIX = 'categories.item'
+_SUBCATEGORY_PREFIX = f'{_CATEGORY_PREFIX}.subcategories.item'
+_POST_PREFIX = f'{_SUBCATEGORY_PREFIX}.posts.item'
+
+_SCALAR_EVENTS = ('string', 'number', 'boolean', 'null')
+
+
+def iter_export(export_file: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Записи экспорта в порядке обхода: категория → ее подкатегории → их посты
+
+    Формат определяется по расширению: .jsonl - построчный (см. iter_jsonl),
+    иначе JSON из WixForumParser.save_results. JSON читается потоково
+    через ijson; без него файл загружается целиком.
+
+    Args:
+        export_file: Путь к файлу экспорта
+
+    Returns:
+        Итератор пар (тип записи, данные); у категорий и подкатегорий
+        нет вложенных списков subcategories/posts
+    """
+    if Path(export_file).suffix == '.jsonl':
+        return iter_jsonl(export_file)
+
+    if ijson is None:
+        logger.warning("ijson не установлен, экспорт загружается в память целиком")
+        return _iter_loaded(export_file)
+
+    return _iter_streamed(export_file)
+
+
+def iter_jsonl(export_file: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Записи построчного экспорта
+
+    Каждая строка - объект {"type": "category" | "subcategory" | "post", "data": {...}}.
+
+    Args:
+        export_file: Путь к .jsonl файлу
+
+    Returns:
+        Итератор пар (тип записи, данные)
+    """
+    with open(export_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logger.error(f"Некорректная строка {line_number} в {export_file}: {e}")
+                continue
+
+            yield record['type'], record['data']
+
+
+def _without_children(record_type: str, data: Dict) -> Dict:
+    """Копия записи без вложенного списка"""
+    return {key: value for key, value in data.items() if key != CHILD_KEYS[record_type]}
+
+
+def _iter_loaded(export_file: str) -> Iterator[Tuple[str, Dict]]:
+    """Обход экспорта, загруженного целиком"""
+    with open(export_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    for category in data.get('categories', []):
+        yield RECORD_CATEGORY, _without_children(RECORD_CATEGORY, category)
+
+        for subcategory in category.get('subcategories', []):
+            yield RECORD_SUBCATEGORY, _without_children(RECORD_SUBCATEGORY, subcategory)
+
+            for post in subcategory.get('posts', []):
+                yield RECORD_POST, post
+
+
+def _iter_streamed(export_file: str) -> Iterator[Tuple[str, Dict]]:
+    """
+    Потоковый обход JSON экспорта по событиям ijson
+
+    Запись категории (подкатегории) выдается, как только начинается ее
+    список subcategories (posts) или закончился объект; поля, записанные
+    после вложенного списка, добавляются в уже выданный словарь позже.
+    Посты собираются целиком по одному.
+    """
+    headers = {
+        _CATEGORY_PREFIX: RECORD_CATEGORY,
+        _SUBCATEGORY_PREFIX: RECORD_SUBCATEGORY,
+    }
+
+    current: Dict[str, Dict] = {}
+    emitted = set()
+    current_key: Dict[str, str] = {}
+
+    # Сборка вложенного значения: (prefix, builder, куда сохранить)
+    building = None
+
+    with open(export_file, 'rb') as f:
+        for prefix, event, value in ijson.parse(f, use_float=True):
+            if building:
+                build_prefix, builder, target = building
+                builder.event(event, value)
+
+                if prefix == build_prefix and event in ('end_map', 'end_array'):
+                    building = None
+                    if target is None:
+                        yield RECORD_POST, builder.value
+                    else:
+                        record, key = target
+                        record[key] = builder.value
+                continue
+
+            if prefix == _POST_PREFIX and event == 'start_map':
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                building = (prefix, builder, None)
+                continue
+
+            if prefix in headers:
+                record_type = headers[prefix]
+
+                if event == 'start_map':
+                    current[prefix] = {}
+                    emitted.discard(prefix)
+                elif event == 'map_key':
+                    current_key[prefix] = value
+                    if value == CHILD_KEYS[record_type] and prefix not in emitted:
+                        emitted.add(prefix)
+                        yield record_type, current[prefix]
+                elif event == 'end_map' and prefix not in emitted:
+                    emitted.add(prefix)
+                    yield record_type, current[prefix]
+                continue
+
+            # Поле записи категории или подкатегории
+            parent, _, key = prefix.rpartition('.')
+            if parent not in headers or key != current_key.get(parent):
+                continue
+
+            if key == CHILD_KEYS[headers[parent]]:
+                continue
+
+            if event in _SCALAR_EVENTS:
+                current[parent][key] = value
+            elif event in ('start_map', 'start_array'):
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                building = (prefix, builder, (current[parent], key))
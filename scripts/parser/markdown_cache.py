@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Персистентный кэш конвертации HTML → Markdown (SQLite)
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .utils import MARKDOWN_CONVERSION_VERSION, MARKDOWN_OPTIONS
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS markdown_cache (
+    key TEXT PRIMARY KEY,
+    markdown TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_markdown_cache_accessed ON markdown_cache (accessed_at);
+"""
+
+
+class MarkdownCache:
+    """
+    Кэш результатов html_to_markdown по хэшу HTML и параметров конвертации
+
+    Размер ограничен: при превышении max_size_mb удаляются записи,
+    к которым дольше всего не обращались (LRU).
+
+    Запись фиксируется транзакцией каждые batch_size строк (и при закрытии),
+    а не на каждый пост. Методы можно вызывать из потоков (asyncio.to_thread):
+    соединение общее и защищено блокировкой.
+    """
+
+    def __init__(self, db_path: str, max_size_mb: float = 512, batch_size: int = 500):
+        """
+        Открытие кэша
+
+        Args:
+            db_path: Путь к файлу SQLite
+            max_size_mb: Максимальный суммарный объем Markdown (MB)
+            batch_size: Сколько изменений фиксировать одной транзакцией
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        self.batch_size = batch_size
+
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._pending_rows = 0
+
+        self.total_size = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM markdown_cache"
+        ).fetchone()[0]
+
+        # Ключ параметров конвертации: при их изменении записи не совпадут
+        self._options_key = json.dumps(
+            [MARKDOWN_CONVERSION_VERSION, MARKDOWN_OPTIONS], sort_keys=True
+        )
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'evicted': 0,
+        }
+
+    def close(self):
+        """Зафиксировать изменения и закрыть соединение с базой"""
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def _count_changes(self, rows: int):
+        """Фиксация транзакции каждые batch_size измененных строк"""
+        self._pending_rows += rows
+        if self._pending_rows >= self.batch_size:
+            self.conn.commit()
+            self._pending_rows = 0
+
+    def key(self, html: str) -> str:
+        """Ключ кэша для HTML"""
+        sha256 = hashlib.sha256(self._options_key.encode('utf-8'))
+        sha256.update(html.encode('utf-8'))
+        return sha256.hexdigest()
+
+    def get_many(self, htmls: List[str]) -> List[Optional[str]]:
+        """
+        Поиск результатов конвертации
+
+        Args:
+            htmls: HTML строки
+
+        Returns:
+            Markdown для найденных строк, None для отсутствующих (в том же порядке)
+        """
+        keys = [self.key(html) for html in htmls]
+        found = {}
+
+        with self._lock:
+            # Порциями, чтобы не превысить лимит параметров SQLite
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                found.update(self.conn.execute(
+                    f"SELECT key, markdown FROM markdown_cache WHERE key IN ({placeholders})",
+                    chunk
+                ))
+
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE markdown_cache SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._count_changes(len(found))
+
+            self.stats['hits'] += len(found)
+            self.stats['misses'] += len(keys) - len(found)
+
+        return [found.get(key) for key in keys]
+
+    def put_many(self, htmls: List[str], markdowns: List[str]):
+        """
+        Сохранение результатов конвертации
+
+        Args:
+            htmls: HTML строки
+            markdowns: Соответствующие Markdown строки
+        """
+        now = time.time()
+        rows = [
+            (self.key(html), markdown, len(markdown.encode('utf-8')), now)
+            for html, markdown in zip(htmls, markdowns)
+        ]
+
+        if not rows:
+            return
+
+        with self._lock:
+            for key, markdown, size, accessed_at in rows:
+                previous = self.conn.execute(
+                    "SELECT size FROM markdown_cache WHERE key = ?", (key,)
+                ).fetchone()
+
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO markdown_cache (key, markdown, size, accessed_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, markdown, size, accessed_at)
+                )
+                self.total_size += size - (previous[0] if previous else 0)
+
+            self._count_changes(len(rows))
+
+            if self.total_size > self.max_size:
+                self._evict()
+
+    def _evict(self):
+        """Удаление давно не использованных записей до 90% лимита (под блокировкой)"""
+        target = int(self.max_size * 0.9)
+        evicted_keys = []
+
+        for key, size in self.conn.execute(
+            "SELECT key, size FROM markdown_cache ORDER BY accessed_at"
+        ).fetchall():
+            if self.total_size <= target:
+                break
+            evicted_keys.append((key,))
+            self.total_size -= size
+
+        self.conn.executemany("DELETE FROM markdown_cache WHERE key = ?", evicted_keys)
+        self._count_changes(len(evicted_keys))
+
+        self.stats['evicted'] += len(evicted_keys)
+        logger.debug(f"Из кэша Markdown удалено записей: {len(evicted_keys)}")
+
+    def summary(self) -> Dict:
+        """Счетчики и объем кэша"""
+        with self._lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM markdown_cache").fetchone()[0]
+
+        return {
+            **self.stats,
+            'entries': entries,
+            'size_bytes': self.total_size,
+        }
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Парсинг нескольких WIX форумов через общий пул браузера
+"""
+
+import asyncio
+import copy
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import yaml
+from playwright.async_api import async_playwright, Browser, Page
+
+from .wix_parser import WixForumParser
+
+logger = logging.getLogger(__name__)
+
+
+def _deep_merge(base: Dict, override: Dict) -> Dict:
+    """Рекурсивное слияние словарей конфигурации (override имеет приоритет)"""
+    result = copy.deepcopy(base)
+
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _deep_merge(result[key], value)
+        else:
+            result[key] = copy.deepcopy(value)
+
+    return result
+
+
+class BrowserPool:
+    """Один браузер Playwright с ограниченным числом одновременных контекстов"""
+
+    def __init__(self, headless: bool = True, max_contexts: int = 2):
+        """
+        Инициализация пула
+
+        Args:
+            headless: Headless режим браузера
+            max_contexts: Максимум одновременно открытых контекстов
+        """
+        self.headless = headless
+        self.max_contexts = max_contexts
+        self.browser: Optional[Browser] = None
+
+        self._playwright = None
+        self._semaphore = asyncio.Semaphore(max_contexts)
+
+    async def __aenter__(self):
+        """Async context manager entry"""
+        self._playwright = await async_playwright().start()
+        self.browser = await self._playwright.chromium.launch(headless=self.headless)
+        logger.info(f"Пул браузера запущен (контекстов: {self.max_contexts})")
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        if self.browser:
+            await self.browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+
+    @asynccontextmanager
+    async def page(self, user_agent: Optional[str] = None):
+        """
+        Получить страницу в отдельном контексте (cookies сайта изолированы)
+
+        Args:
+            user_agent: User-Agent контекста
+        """
+        async with self._semaphore:
+            context = await self.browser.new_context(user_agent=user_agent)
+            try:
+                page: Page = await context.new_page()
+                yield page
+            finally:
+                await context.close()
+
+
+class MultiSiteRunner:
+    """Запуск парсинга нескольких форумов с общим пулом браузера"""
+
+    def __init__(self, config_path: str = "config/sites.yaml"):
+        """
+        Инициализация запуска
+
+        Args:
+            config_path: Путь к конфигурации списка сайтов
+        """
+        with open(config_path, 'r', encoding='utf-8') as f:
+            self.config = yaml.safe_load(f)
+
+        base_config_path = self.config.get('base_config', 'config/wix_config.yaml')
+        with open(base_config_path, 'r', encoding='utf-8') as f:
+            self.base_config = yaml.safe_load(f)
+
+        self.sites: List[Dict] = self.config.get('sites', [])
+        self.results: Dict[str, Dict] = {}
+
+    def build_site_config(self, site: Dict) -> Dict:
+        """
+        Конфигурация парсера для одного сайта
+
+        Настройки сайта накладываются на базовую конфигурацию, а экспорт
+        и вложения по умолчанию раскладываются в поддиректории по имени сайта.
+
+        Args:
+            site: Описание сайта из sites.yaml
+
+        Returns:
+            Полная конфигурация для WixForumParser
+        """
+        name = site['name']
+        overrides = {key: value for key, value in site.items() if key != 'name'}
+        config = _deep_merge(self.base_config, overrides)
+
+        if 'output_dir' not in site.get('export', {}):
+            config['export']['output_dir'] = str(
+                Path(self.base_config['export']['output_dir']) / name
+            )
+
+        if 'download_dir' not in site.get('attachments', {}):
+            config['attachments']['download_dir'] = str(
+                Path(self.base_config['attachments']['download_dir']) / name
+            )
+
+        config['site_name'] = name
+        return config
+
+    async def _run_site(self, pool: BrowserPool, site: Dict):
+        """Парсинг одного сайта на странице из пула"""
+        name = site['name']
+        config = self.build_site_config(site)
+        parser = WixForumParser(config=config)
+
+        try:
+            async with pool.page(user_agent=config['parsing']['user_agent']) as page:
+                logger.info(f"🌐 [{name}] Начало парсинга: {config['forum_url']}")
+                await parser.run_full_parse(page=page)
+
+            self.results[name] = {'status': 'ok', 'statistics': parser.stats}
+
+        except Exception as e:
+            logger.error(f"✗ [{name}] Ошибка парсинга: {e}")
+            self.results[name] = {'status': 'error', 'error': str(e), 'statistics': parser.stats}
+
+    async def run(self) -> Dict[str, Dict]:
+        """
+        Парсинг всех сайтов
+
+        Returns:
+            Результаты по сайтам {name: {'status', 'statistics', ...}}
+        """
+        pool_config = self.config.get('browser_pool', {})
+
+        async with BrowserPool(
+            headless=pool_config.get('headless', self.base_config['parsing']['headless']),
+            max_contexts=pool_config.get('max_contexts', 2)
+        ) as pool:
+            await asyncio.gather(*(self._run_site(pool, site) for site in self.sites))
+
+        return self.results
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Ограничители частоты запросов и полосы пропускания
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+
+class RateLimiter:
+    """Минимальный интервал между запросами (например, к одному сайту)"""
+
+    def __init__(self, min_interval: float = 0):
+        """
+        Инициализация ограничителя
+
+        Args:
+            min_interval: Минимальный интервал между запросами (секунды)
+        """
+        self.min_interval = min_interval or 0
+        self._next_time = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Дождаться разрешения на следующий запрос"""
+        if self.min_interval <= 0:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+
+            if delay > 0:
+                await asyncio.sleep(delay)
+                now = time.monotonic()
+
+            self._next_time = now + self.min_interval
+
+
+class TokenBucket:
+    """Ограничение объема (например, байт в секунду) по алгоритму token bucket"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Инициализация ограничителя
+
+        Args:
+            rate: Допустимый объем в секунду (0 или None - без ограничения)
+            capacity: Максимальный всплеск (по умолчанию равен rate)
+        """
+        self.rate = rate or 0
+        self.capacity = capacity or self.rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consume(self, amount: float):
+        """
+        Списать объем, при необходимости дождавшись его накопления
+
+        Args:
+            amount: Объем (например, размер полученного блока в байтах)
+        """
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity,
+                self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+
+            # Долг погашается ожиданием; блокировка сохраняет очередность
+            if self._tokens < 0:
+                await asyncio.sleep(-self._tokens / self.rate)
+
+
+class ThroughputMeter:
+    """Скорость передачи данных за скользящее окно"""
+
+    def __init__(self, window: float = 5.0):
+        """
+        Инициализация измерителя
+
+        Args:
+            window: Длина окна (секунды)
+        """
+        self.window = window
+        self.total = 0
+        self._samples: Deque[Tuple[float, int]] = deque()
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+
+    def record(self, amount: int):
+        """Учесть переданный объем"""
+        now = time.monotonic()
+        if self._first is None:
+            self._first = now
+        self._last = now
+        self.total += amount
+        self._samples.append((now, amount))
+        self._trim(now)
+
+    def _trim(self, now: float):
+        """Удалить записи за пределами окна"""
+        while self._samples and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+    def rate(self) -> float:
+        """Текущая скорость (объем в секунду)"""
+        self._trim(time.monotonic())
+        return sum(amount for _, amount in self._samples) / self.window
+
+    def average(self) -> float:
+        """Средняя скорость от первой до последней передачи (не меньше секунды)"""
+        if self._first is None:
+            return 0.0
+        return self.total / max(self._last - self._first, 1.0)
@@ -3,8 +3,10 @@
 Вспомогательные утилиты для парсера
 """
 
+import logging
 import re
 from datetime import datetime
+from pathlib import Path
 from typing import Optional
 from urllib.parse import urljoin, urlparse
 
@@ -12,6 +14,41 @@ from bs4 import BeautifulSoup
 from markdownify import markdownify as md
 
 
+# Параметры конвертации HTML → Markdown; входят в ключ кэша конвертации,
+# поэтому при их изменении (или изменении постобработки - увеличить
+# MARKDOWN_CONVERSION_VERSION) кэш пересчитывается
+MARKDOWN_OPTIONS = {
+    'heading_style': "ATX",  # используйте # для заголовков
+    'bullets': "-",  # используйте - для списков
+    'strong_em_symbol': "**",  # используйте ** для жирного
+    'strip': ['script', 'style'],  # удалить script и style теги
+}
+MARKDOWN_CONVERSION_VERSION = 1
+
+
+def setup_logging(log_file: str = 'logs/parser.log', level: int = logging.INFO):
+    """
+    Настройка логирования парсера: файл и консоль
+    
+    Вызывается из точек входа (run_parser.py, run_multi_site.py и т.д.), а не
+    при импорте пакета: модули parser используются и импортером со своим
+    логированием.
+    
+    Args:
+        log_file: Путь к файлу лога
+        level: Уровень логирования
+    """
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=level,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+
+
 def clean_text(text: str) -> str:
     """
     Очистка текста от лишних пробелов и символов
@@ -48,13 +85,7 @@ def html_to_markdown(html: str) -> str:
         return ""
     
     # Конвертировать в Markdown
-    markdown = md(
-        html,
-        heading_style="ATX",  # используйте # для заголовков
-        bullets="-",  # используйте - для списков
-        strong_em_symbol="**",  # используйте ** для жирного
-        strip=['script', 'style']  # удалить script и style теги
-    )
+    markdown = md(html, **MARKDOWN_OPTIONS)
     
     # Очистить множественные переносы строк
     markdown = re.sub(r'\n{3,}', '\n\n', markdown)
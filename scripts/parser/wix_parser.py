@@ -9,22 +9,16 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
+from urllib.parse import urlparse
 
 from playwright.async_api import async_playwright, Page, Browser
 import yaml
 from tqdm import tqdm
 
 from .attachment_downloader import AttachmentDownloader
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/parser.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from .crawl_scheduler import CrawlScheduler
+from .rate_limit import RateLimiter
+from .utils import make_absolute_url, setup_logging
 
 logger = logging.getLogger(__name__)
 
@@ -32,17 +26,32 @@ logger = logging.getLogger(__name__)
 class WixForumParser:
     """Парсер для извлечения данных из WIX форума"""
     
-    def __init__(self, config_path: str = "config/wix_config.yaml"):
+    def __init__(
+        self,
+        config_path: str = "config/wix_config.yaml",
+        config: Optional[Dict] = None
+    ):
         """
         Инициализация парсера
         
         Args:
             config_path: Путь к конфигурационному файлу
+            config: Готовая конфигурация (вместо чтения config_path),
+                используется при мультисайтовом запуске
         """
-        self.config = self._load_config(config_path)
+        self.config = config if config is not None else self._load_config(config_path)
         self.browser: Optional[Browser] = None
         self.page: Optional[Page] = None
         
+        # Базовый URL сайта для абсолютных ссылок
+        parsed_url = urlparse(self.config['forum_url'])
+        self.base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
+        
+        # Ограничение частоты переходов по страницам сайта
+        self.rate_limiter = RateLimiter(
+            self.config['parsing'].get('min_request_interval', 0)
+        )
+        
         # Данные
         self.categories: List[Dict] = []
         self.subcategories: List[Dict] = []
@@ -92,6 +101,18 @@ class WixForumParser:
         
         logger.info("Браузер инициализирован")
         
+    def _absolute_url(self, url: Optional[str]) -> Optional[str]:
+        """Абсолютный URL относительно сайта форума"""
+        if not url:
+            return None
+        return make_absolute_url(self.base_url, url)
+    
+    async def _goto(self, url: str):
+        """Переход на страницу с учетом ограничения частоты запросов"""
+        await self.rate_limiter.wait()
+        await self.page.goto(url)
+        await self.page.wait_for_load_state('networkidle')
+        
     async def login(self):
         """Авторизация на форуме (если требуется)"""
         auth_config = self.config.get('auth', {})
@@ -104,8 +125,7 @@ class WixForumParser:
         
         try:
             # Перейти на страницу входа
-            await self.page.goto(self.config['forum_url'])
-            await self.page.wait_for_load_state('networkidle')
+            await self._goto(self.config['forum_url'])
             
             # Найти и кликнуть на кнопку "Log In"
             login_button = await self.page.query_selector('text="Log In"')
@@ -155,8 +175,7 @@ class WixForumParser:
         logger.info("Начало парсинга категорий...")
         
         try:
-            await self.page.goto(self.config['forum_url'])
-            await self.page.wait_for_load_state('networkidle')
+            await self._goto(self.config['forum_url'])
             await self.page.wait_for_timeout(2000)  # Дать время для загрузки динамического контента
             
             categories = []
@@ -198,7 +217,7 @@ class WixForumParser:
                     category = {
                         'id': f"cat_{idx + 1}",
                         'title': title,
-                        'url': url if url and url.startswith('http') else f"https://www.fisherydb.com{url}" if url else None,
+                        'url': self._absolute_url(url),
                         'description': description.strip(),
                         'posts_count': posts_count_text.strip(),
                         'subcategories': []
@@ -244,8 +263,7 @@ class WixForumParser:
                 return subcategories
             
             # Перейти на страницу категории
-            await self.page.goto(category['url'])
-            await self.page.wait_for_load_state('networkidle')
+            await self._goto(category['url'])
             await self.page.wait_for_timeout(2000)
             
             # Найти элементы подкатегорий (они используют те же селекторы что и категории)
@@ -276,7 +294,7 @@ class WixForumParser:
                     subcategory = {
                         'id': f"{category['id']}_sub_{idx + 1}",
                         'title': title,
-                        'url': url if url and url.startswith('http') else f"https://www.fisherydb.com{url}" if url else None,
+                        'url': self._absolute_url(url),
                         'description': description.strip(),
                         'posts': []
                     }
@@ -319,8 +337,7 @@ class WixForumParser:
                 return posts
             
             # Перейти на страницу подкатегории
-            await self.page.goto(subcategory['url'])
-            await self.page.wait_for_load_state('networkidle')
+            await self._goto(subcategory['url'])
             await self.page.wait_for_timeout(2000)
             
             # Найти элементы постов
@@ -392,13 +409,21 @@ class WixForumParser:
                     desc_elem = await elem.query_selector(self.config['selectors']['post_description'])
                     description = await desc_elem.inner_text() if desc_elem else ""
                     
+                    # Получить количество комментариев (для планировщика)
+                    comments_count = ""
+                    comments_selector = self.config['selectors'].get('post_comments_count')
+                    if comments_selector:
+                        comments_elem = await elem.query_selector(comments_selector)
+                        comments_count = await comments_elem.inner_text() if comments_elem else ""
+                    
                     post = {
                         'id': f"{subcategory['id']}_post_{idx + 1}",
                         'title': title_text.strip(),
-                        'url': url if url and url.startswith('http') else f"https://www.fisherydb.com{url}" if url else None,
+                        'url': self._absolute_url(url),
                         'author': author.strip(),
                         'created_at': created_at.strip(),
                         'description': description.strip(),
+                        'comments_count': comments_count.strip(),
                         'content': '',  # Будет заполнено при детальном парсинге
                         'attachments': [],
                         'comments': []
@@ -438,8 +463,7 @@ class WixForumParser:
         logger.debug(f"Детальный парсинг поста: {post['title'][:50]}...")
         
         try:
-            await self.page.goto(post['url'])
-            await self.page.wait_for_load_state('networkidle')
+            await self._goto(post['url'])
             await self.page.wait_for_timeout(2000)
             
             # Получить полный контент поста
@@ -513,8 +537,14 @@ class WixForumParser:
         return post
     
     
-    async def run_full_parse(self):
-        """Полный парсинг форума"""
+    async def run_full_parse(self, page: Optional[Page] = None):
+        """
+        Полный парсинг форума
+        
+        Args:
+            page: Страница из общего пула браузера (мультисайтовый запуск).
+                Если не указана, парсер запускает собственный браузер
+        """
         logger.info("=" * 80)
         logger.info("🚀 НАЧАЛО ПОЛНОГО ПАРСИНГА ФОРУМА")
         logger.info("=" * 80)
@@ -525,14 +555,25 @@ class WixForumParser:
             # Инициализировать загрузчик вложений
             self.downloader = AttachmentDownloader(self.config)
             await self.downloader.__aenter__()
+            self.downloader.start_workers()
+            
+            if page is not None:
+                self.page = page
+                self.page.set_default_timeout(
+                    self.config['parsing']['page_load_timeout'] * 1000
+                )
+            else:
+                await self.initialize_browser()
             
-            await self.initialize_browser()
             await self.login()
             
             # Парсинг категорий
             categories = await self.parse_categories()
             
-            # Парсинг каждой категории
+            # Планировщик детального парсинга постов
+            scheduler = CrawlScheduler(self.config.get('scheduling', {}))
+            
+            # Этап 1: обход списков подкатегорий и постов
             logger.info(f"\n📂 Обработка {len(categories)} категорий...")
             
             for category in tqdm(categories, desc="Категории", unit="cat"):
@@ -540,7 +581,7 @@ class WixForumParser:
                 subcategories = await self.parse_subcategories(category)
                 category['subcategories'] = subcategories
                 
-                # Парсинг постов в каждой подкатегории
+                # Парсинг списков постов в каждой подкатегории
                 if subcategories:
                     logger.info(f"\n  📁 Обработка подкатегорий в '{category['title']}'...")
                     
@@ -548,30 +589,51 @@ class WixForumParser:
                         posts = await self.parse_posts(subcategory)
                         subcategory['posts'] = posts
                         
-                        # Обработка постов - детальный парсинг
-                        if posts:
-                            for post in tqdm(posts, desc=f"    Детали постов", leave=False):
-                                # Парсинг деталей поста (комментарии, вложения)
-                                await self.parse_post_details(post)
-                                
-                                # Скачать вложения если есть
-                                if post.get('attachments') and self.downloader:
-                                    updated_attachments = await self.downloader.download_attachments(
-                                        post['attachments'],
-                                        post_id=post['id'],
-                                        show_progress=False
-                                    )
-                                    post['attachments'] = updated_attachments
-                                    self.stats['files_downloaded'] += len([a for a in updated_attachments if a.get('downloaded')])
-                                
-                                # Задержка между постами
-                                await asyncio.sleep(1)
+                        for post in posts:
+                            scheduler.push(post, category, subcategory)
                         
                         # Задержка между запросами
                         await asyncio.sleep(
                             self.config['parsing']['delay_between_requests']
                         )
             
+            # Этап 2: детальный парсинг постов в порядке приоритета
+            logger.info(
+                f"\n📝 Детальный парсинг {len(scheduler)} постов "
+                f"(политика: {', '.join(scheduler.policy_names)})..."
+            )
+            
+            for job in tqdm(scheduler, total=len(scheduler), desc="Детали постов"):
+                post = job['post']
+                
+                # Парсинг деталей поста (комментарии, вложения)
+                await self.parse_post_details(post)
+                
+                # Поставить вложения в фоновую очередь загрузки
+                if post.get('attachments') and self.downloader:
+                    await self.downloader.enqueue(post)
+                
+                # Задержка между постами
+                await asyncio.sleep(1)
+            
+            # Дождаться завершения фоновых загрузок
+            if self.downloader:
+                logger.info("\n📎 Ожидание завершения загрузки вложений...")
+                await self.downloader.drain()
+                
+                download_stats = self.downloader.get_stats()
+                download_stats.pop('manifest')
+                self.stats['downloads'] = download_stats
+                
+                self.stats['files_downloaded'] = sum(
+                    1
+                    for category in categories
+                    for subcategory in category.get('subcategories', [])
+                    for post in subcategory.get('posts', [])
+                    for attachment in post.get('attachments', [])
+                    if attachment.get('downloaded')
+                )
+            
             # Сохранение результатов
             self.save_results()
             
@@ -610,6 +672,18 @@ class WixForumParser:
         logger.info(f"✓ Обработано постов:        {self.stats['posts_parsed']}")
         logger.info(f"✓ Обработано комментариев:  {self.stats['comments_parsed']}")
         logger.info(f"✓ Скачано файлов:           {self.stats['files_downloaded']}")
+        
+        downloads = self.stats.get('downloads')
+        if downloads:
+            logger.info(
+                f"✓ Получено данных:          {downloads['bytes_received'] / (1024 * 1024):.1f} MB "
+                f"(в среднем {downloads['average_bytes_per_sec'] / (1024 * 1024):.2f} MB/s)"
+            )
+            logger.info(f"↻ Повторов загрузки:        {downloads['retries']}")
+            logger.info(f"⚠ Не скачано файлов:        {downloads['failed']}")
+            for reason, count in sorted(downloads['failures_by_reason'].items()):
+                logger.info(f"    {reason}: {count}")
+        
         logger.info(f"⚠ Ошибок:                   {self.stats['errors_count']}")
         logger.info(f"⏱ Время выполнения:         {duration}")
         logger.info("=" * 80 + "\n")
@@ -621,6 +695,10 @@ class WixForumParser:
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
+        if self.config['export'].get('format') == 'jsonl':
+            self._save_results_jsonl(output_dir / f"forum_structure_{timestamp}.jsonl")
+            return
+        
         # Сохранить структуру форума
         structure_file = output_dir / f"forum_structure_{timestamp}.json"
         
@@ -647,10 +725,41 @@ class WixForumParser:
             json.dump(data, f, ensure_ascii=False, indent=2)
         
         logger.info(f"\n💾 Результаты сохранены в: {structure_file}")
+    
+    def _save_results_jsonl(self, structure_file: Path):
+        """
+        Сохранение результатов построчно (по записи на категорию, подкатегорию и пост)
+        
+        Формат читается потоково без дополнительных зависимостей
+        (см. export_reader.iter_jsonl).
+        
+        Args:
+            structure_file: Путь к .jsonl файлу
+        """
+        def write(f, record_type: str, data: Dict):
+            f.write(json.dumps({'type': record_type, 'data': data}, ensure_ascii=False))
+            f.write('\n')
+        
+        with open(structure_file, 'w', encoding='utf-8') as f:
+            for category in self.categories:
+                write(f, 'category', {
+                    key: value for key, value in category.items() if key != 'subcategories'
+                })
+                
+                for subcategory in category.get('subcategories', []):
+                    write(f, 'subcategory', {
+                        key: value for key, value in subcategory.items() if key != 'posts'
+                    })
+                    
+                    for post in subcategory.get('posts', []):
+                        write(f, 'post', post)
+        
+        logger.info(f"\n💾 Результаты сохранены в: {structure_file}")
 
 
 async def main():
     """Главная функция"""
+    setup_logging()
     parser = WixForumParser()
     await parser.run_full_parse()
 
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Замер производительности импортера на синтетических данных и имитаторе Discourse
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+from loguru import logger
+
+# Добавить текущую директорию в PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from importer.discourse_importer import DiscourseImporter
+from importer.mock_discourse import MockDiscourseServer
+from importer.synthetic_export import SyntheticExportGenerator
+
+
+def parse_args():
+    """Аргументы командной строки"""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+
+    scale = arg_parser.add_argument_group('размер синтетического экспорта')
+    scale.add_argument('--categories', type=int, default=3)
+    scale.add_argument('--subcategories', type=int, default=3, help='в категории')
+    scale.add_argument('--posts', type=int, default=20, help='в подкатегории')
+    scale.add_argument('--comments', type=int, default=3, help='в посте, в среднем')
+    scale.add_argument('--attachments', type=int, default=1, help='в посте, в среднем')
+    scale.add_argument('--attachment-pool', type=int, default=50, help='разных файлов')
+    scale.add_argument('--attachment-size', type=int, default=64 * 1024, help='байт')
+    scale.add_argument('--seed', type=int, default=1)
+
+    server = arg_parser.add_argument_group('имитатор Discourse')
+    server.add_argument('--latency', type=float, default=0.05, help='задержка ответа, с')
+    server.add_argument('--rate-limit', type=float, default=0,
+                        help='запросов в секунду (0 - без ограничения)')
+    server.add_argument('--rate-limit-burst', type=float, default=None)
+    server.add_argument('--error-rate', type=float, default=0, help='доля ответов 502')
+
+    importer = arg_parser.add_argument_group('импортер')
+    importer.add_argument('--config', default='config/discourse_config.yaml.example',
+                          help='базовая конфигурация импортера')
+    importer.add_argument('--concurrency', type=int, default=None)
+    importer.add_argument('--delay', type=float, default=0,
+                          help='import.delay_between_requests')
+    importer.add_argument('--retry-delay', type=float, default=1,
+                          help='error_handling.retry_delay')
+
+    importer.add_argument('--reimport', action='store_true',
+                          help='повторный импорт с новой базой маппинга: замер загрузки '
+                               'существующих категорий и топиков (skip_existing_*)')
+
+    arg_parser.add_argument('--work-dir', default=None,
+                            help='директория для данных (по умолчанию временная, удаляется)')
+    arg_parser.add_argument('--report', default=None, help='сохранить отчет в JSON файл')
+
+    return arg_parser.parse_args()
+
+
+def build_config(args, base_url: str, work_dir: Path, mapping_db: str = 'import_mapping.db') -> dict:
+    """Конфигурация импортера: базовая + имитатор и файлы в рабочей директории"""
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    config['discourse_url'] = base_url
+    config['api'] = {'key': 'benchmark', 'username': 'system'}
+
+    config['import']['dry_run'] = False
+    config['import']['delay_between_requests'] = args.delay
+    config['import']['mapping_db'] = str(work_dir / mapping_db)
+    if args.concurrency:
+        config['import']['concurrency'] = args.concurrency
+
+    config['content'].setdefault('conversion_cache', {})['path'] = str(work_dir / 'markdown_cache.db')
+    config['attachments'].setdefault('image_optimization', {})['enabled'] = False
+    config.setdefault('error_handling', {})['retry_delay'] = args.retry_delay
+    config['logging'] = {'level': 'WARNING', 'file': str(work_dir / 'importer.log')}
+    config['stats'] = {'save_stats': False}
+
+    return config
+
+
+def peak_memory_mb(who: int) -> float:
+    """Пиковый RSS (ru_maxrss в KB на Linux)"""
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+async def timed_import(config: dict, export_file: Path):
+    """Импорт с замером времени; (импортер, секунды)"""
+    started = time.perf_counter()
+    async with DiscourseImporter(config=config) as importer:
+        await importer.import_from_json(str(export_file))
+    return importer, time.perf_counter() - started
+
+
+async def run(args) -> dict:
+    """Генерация данных, запуск имитатора и импорт"""
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix='discourse_benchmark_'))
+
+    try:
+        generator = SyntheticExportGenerator(
+            categories=args.categories,
+            subcategories=args.subcategories,
+            posts=args.posts,
+            comments=args.comments,
+            attachments=args.attachments,
+            attachment_pool=args.attachment_pool,
+            attachment_size=args.attachment_size,
+            seed=args.seed
+        )
+        export_file = generator.generate(str(work_dir / 'export'))
+
+        server = MockDiscourseServer(
+            latency=args.latency,
+            rate_limit=args.rate_limit,
+            rate_limit_burst=args.rate_limit_burst,
+            error_rate=args.error_rate,
+            seed=args.seed
+        )
+        base_url = await server.start()
+
+        try:
+            config = build_config(args, base_url, work_dir)
+            importer, duration = await timed_import(config, export_file)
+
+            # Счетчики имитатора и память - сразу после первого импорта,
+            # чтобы повторный импорт не попал в основной отчет
+            server_summary = copy.deepcopy(server.summary())
+            peak_rss_mb = peak_memory_mb(resource.RUSAGE_SELF)
+            peak_rss_children_mb = peak_memory_mb(resource.RUSAGE_CHILDREN)
+
+            reimport = None
+            if args.reimport:
+                # Маппинг пуст: повторы находятся только по данным Discourse
+                config = build_config(args, base_url, work_dir, 'import_mapping_reimport.db')
+                reimporter, reimport_duration = await timed_import(config, export_file)
+                reimport_summary = server.summary()
+                reimport = {
+                    'duration_seconds': round(reimport_duration, 2),
+                    'categories_existing': reimporter.stats['categories_existing'],
+                    'topics_existing': reimporter.stats['topics_existing'],
+                    'topics_created': reimporter.stats['topics_created'],
+                    'errors': reimporter.stats['errors'],
+                    'retries': reimporter.stats['retries'],
+                    # Только запросы повторного импорта
+                    **{
+                        key: reimport_summary[key] - server_summary[key]
+                        for key in ('requests', 'throttled', 'server_errors')
+                    },
+                    'peak_rss_mb': round(peak_memory_mb(resource.RUSAGE_SELF), 1),
+                }
+        finally:
+            await server.stop()
+
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    posts_total = importer.stats['topics_created'] + importer.stats['posts_created']
+
+    return {
+        'export': generator.stats,
+        'duration_seconds': round(duration, 2),
+        'topics_per_sec': round(importer.stats['topics_created'] / duration, 2),
+        'posts_per_sec': round(posts_total / duration, 2),
+        'requests_per_sec': round(server_summary['requests'] / duration, 2),
+        'importer': importer.stats,
+        'server': server_summary,
+        # Имитатор и генератор экспорта работают в том же процессе, что и импортер
+        'peak_rss_mb': round(peak_rss_mb, 1),
+        'peak_rss_children_mb': round(peak_rss_children_mb, 1),
+        'reimport': reimport,
+    }
+
+
+def main():
+    """Главная функция"""
+    args = parse_args()
+
+    # Вывод каждого запроса в консоль искажает замер: только предупреждения
+    logger.remove()
+    logger.add(sys.stderr, level='WARNING')
+
+    print("=" * 80)
+    print("ЗАМЕР ПРОИЗВОДИТЕЛЬНОСТИ ИМПОРТА")
+    print("=" * 80)
+    print()
+
+    report = asyncio.run(run(args))
+
+    print()
+    print("📊 Результаты:")
+    print(f"   Экспорт: {report['export']}")
+    print(f"   Время: {report['duration_seconds']} с")
+    print(f"   Топиков в секунду: {report['topics_per_sec']}")
+    print(f"   Постов в секунду (включая первые посты топиков): {report['posts_per_sec']}")
+    print(f"   Запросов в секунду: {report['requests_per_sec']}")
+    print(f"   Повторов: {report['importer']['retries']}, "
+          f"ответов 429: {report['server']['throttled']}, "
+          f"ответов 502: {report['server']['server_errors']}")
+    print(f"   Ошибок импорта: {report['importer']['errors']}")
+    print(f"   Пиковая память: {report['peak_rss_mb']} MB "
+          f"(процессы конвертации: {report['peak_rss_children_mb']} MB)")
+    print("     включает имитатор Discourse и генератор синтетического экспорта "
+          "(работают в процессе импортера)")
+
+    if report['reimport']:
+        reimport = report['reimport']
+        print()
+        print("🔁 Повторный импорт (отдельно от замера выше):")
+        print(f"   Время: {reimport['duration_seconds']} с, запросов: {reimport['requests']}")
+        print(f"   Найдено категорий {reimport['categories_existing']}, "
+              f"топиков {reimport['topics_existing']}, "
+              f"создано топиков {reimport['topics_created']}")
+        print(f"   Повторов: {reimport['retries']}, ответов 429: {reimport['throttled']}, "
+              f"ответов 502: {reimport['server_errors']}, ошибок импорта: {reimport['errors']}")
+        print(f"   Пиковая память с начала замера: {reimport['peak_rss_mb']} MB")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Отчет сохранен в: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
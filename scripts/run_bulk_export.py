@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Подготовка промежуточной базы для серверного bulk импорта в Discourse
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+import yaml
+
+# Добавить текущую директорию в PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from importer.bulk_export import BulkExporter
+
+
+async def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('export_file', help='forum_structure_*.json или *.jsonl')
+    arg_parser.add_argument('--config', default='config/discourse_config.yaml')
+    arg_parser.add_argument('--output', default=None,
+                            help='путь к базе (по умолчанию bulk_export.output_db)')
+    args = arg_parser.parse_args()
+
+    print("=" * 80)
+    print("ПОДГОТОВКА BULK ИМПОРТА В DISCOURSE")
+    print("=" * 80)
+    print()
+
+    if not Path(args.export_file).exists():
+        print(f"❌ Ошибка: Файл не найден: {args.export_file}")
+        sys.exit(1)
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    exporter = BulkExporter(config, args.output)
+
+    try:
+        output_path = await exporter.export(args.export_file)
+    finally:
+        exporter.close()
+
+    print()
+    print(f"✅ База создана: {output_path}")
+    print()
+    print("📊 Статистика:")
+    print(f"   Пользователей: {exporter.stats['users']}")
+    print(f"   Категорий: {exporter.stats['categories']}")
+    print(f"   Топиков: {exporter.stats['topics']}")
+    print(f"   Постов: {exporter.stats['posts']}")
+    print(f"   Файлов: {exporter.stats['uploads']}")
+    if exporter.stats['missing_attachments']:
+        print(f"   ⚠️  Вложений без локального файла: {exporter.stats['missing_attachments']}")
+    print()
+    print("Дальше база загружается на сервере Discourse скриптами")
+    print("script/bulk_import (generic_bulk.rb), см. их документацию.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -77,7 +77,17 @@ async def main():
         print(f"   Топиков создано: {importer.stats['topics_created']}")
         print(f"   Постов создано: {importer.stats['posts_created']}")
         print(f"   Вложений загружено: {importer.stats['attachments_uploaded']}")
+        print(f"   Вложений без повторной загрузки: {importer.stats['attachments_deduplicated']}")
+        print(f"   Пропущено (импортировано ранее): {importer.stats['skipped_imported']}")
+        print(f"   Уже существовало в Discourse: категорий {importer.stats['categories_existing']}, "
+              f"топиков {importer.stats['topics_existing']}")
         print(f"   Ошибок: {importer.stats['errors']}")
+        print(f"   Повторов запросов: {importer.stats['retries']}")
+        print(f"   Ответов 429 (лимит): {importer.stats['throttled_requests']}, "
+              f"ожидание {importer.stats['throttle_wait_seconds']:.0f} с")
+        if importer.image_optimizer:
+            saved_mb = importer.image_optimizer.stats['bytes_saved'] / (1024 * 1024)
+            print(f"   Сэкономлено на пережатии изображений: {saved_mb:.1f} MB")
         print()
         
     except KeyboardInterrupt:
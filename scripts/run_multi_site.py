@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Скрипт для запуска парсинга нескольких WIX форумов
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Добавить текущую директорию в PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from parser.multi_site import MultiSiteRunner
+from parser.utils import setup_logging
+
+
+async def main():
+    """Главная функция"""
+    print("\n" + "=" * 80)
+    print("🚀 МУЛЬТИСАЙТОВЫЙ ПАРСЕР WIX ФОРУМОВ")
+    print("=" * 80)
+    print()
+
+    config_file = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("config/sites.yaml")
+
+    if not config_file.exists():
+        print("❌ Ошибка: Файл конфигурации сайтов не найден!")
+        print(f"   Ожидается: {config_file.absolute()}")
+        print()
+        print("📝 Создайте файл конфигурации на основе примера:")
+        print("   cp config/sites.yaml.example config/sites.yaml")
+        print()
+        return
+
+    setup_logging()
+    runner = MultiSiteRunner(str(config_file))
+
+    print(f"✓ Сайтов в конфигурации: {len(runner.sites)}")
+    print()
+
+    try:
+        results = await runner.run()
+
+        print()
+        print("=" * 80)
+        print("📊 ИТОГИ ПО САЙТАМ")
+        print("=" * 80)
+        for name, result in results.items():
+            stats = result['statistics']
+            status = "✅" if result['status'] == 'ok' else "❌"
+            print(f"{status} {name}")
+            print(f"   Категорий: {stats['categories_parsed']}, "
+                  f"постов: {stats['posts_parsed']}, "
+                  f"файлов: {stats['files_downloaded']}, "
+                  f"ошибок: {stats['errors_count']}")
+            if result.get('error'):
+                print(f"   Ошибка: {result['error']}")
+        print()
+
+    except KeyboardInterrupt:
+        print()
+        print("⚠️  ПАРСИНГ ПРЕРВАН ПОЛЬЗОВАТЕЛЕМ")
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -10,6 +10,7 @@ from pathlib import Path
 # Добавить текущую директорию в PYTHONPATH
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from parser.utils import setup_logging
 from parser.wix_parser import WixForumParser
 
 
@@ -37,6 +38,8 @@ async def main():
     print(f"✓ Логи будут записаны в: logs/parser.log")
     print()
     
+    setup_logging()
+    
     # Создать парсер
     parser = WixForumParser(str(config_file))
     
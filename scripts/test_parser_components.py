@@ -5,13 +5,19 @@
 """
 
 import asyncio
+import gzip
 import sys
+import tempfile
 from pathlib import Path
 
+from aiohttp import web
+
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from parser.attachment_downloader import AttachmentDownloader
+from parser.content_sniffer import sniff_content
 from parser.wix_parser import WixForumParser
-from parser.utils import parse_date, html_to_markdown, extract_wix_attachment_info
+from parser.utils import parse_date, html_to_markdown, extract_wix_attachment_info, setup_logging
 
 
 async def test_connection():
@@ -199,6 +205,117 @@ def test_utils():
     print("\n✅ Все тесты утилит пройдены!")
 
 
+def report(title: str, ok: bool) -> bool:
+    """Вывод результата одной проверки"""
+    print(f"  {'✓' if ok else '❌'} {title}")
+    return ok
+
+
+async def test_downloads():
+    """Тест загрузчика вложений на локальном HTTP сервере (без форума)"""
+    print("\n" + "=" * 80)
+    print("📥 ТЕСТ ЗАГРУЗКИ ВЛОЖЕНИЙ")
+    print("=" * 80)
+    
+    csv_body = ("id;name\n" + "".join(f"{i};строка {i}\n" for i in range(500))).encode('utf-8')
+    
+    async def gzip_csv(request):
+        # Content-Length - размер сжатых байт, aiohttp отдает распакованные
+        return web.Response(
+            body=gzip.compress(csv_body),
+            headers={'Content-Type': 'text/csv', 'Content-Encoding': 'gzip'}
+        )
+    
+    async def pdf(request):
+        return web.Response(body=b'%PDF-1.4\n' + b'0' * 8192, headers={'Content-Type': 'application/pdf'})
+    
+    app = web.Application()
+    app.router.add_get('/data.csv', gzip_csv)
+    app.router.add_get('/manual', pdf)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    
+    passed = True
+    try:
+        with tempfile.TemporaryDirectory() as download_dir:
+            config = {
+                'attachments': {
+                    'download_dir': download_dir,
+                    'allowed_extensions': ['.csv', '.pdf'],
+                    'max_file_size': 10,
+                    'retry': {'max_attempts': 2, 'base_delay': 0.01},
+                }
+            }
+            
+            print("\n🗜️  Ответ с Content-Encoding: gzip:")
+            async with AttachmentDownloader(config) as downloader:
+                local_path = await downloader.download_file(f"{base_url}/data.csv", 'data.csv')
+                
+                passed &= report("файл скачан", local_path is not None)
+                passed &= report(
+                    "без size_mismatch",
+                    'size_mismatch' not in downloader.failures_by_reason
+                )
+                passed &= report(
+                    "содержимое распаковано",
+                    local_path is not None and Path(local_path).read_bytes() == csv_body
+                )
+                
+                print("\n🔗 Текст ссылки с точкой ('Manual rev.3'), внутри PDF:")
+                local_path = await downloader.download_file(f"{base_url}/manual", 'Manual rev.3')
+                passed &= report("файл скачан", local_path is not None)
+                passed &= report(
+                    "расширение по содержимому",
+                    local_path is not None and local_path.endswith('.pdf')
+                )
+    finally:
+        await runner.cleanup()
+    
+    print("\n✅ Все тесты загрузки пройдены!" if passed else "\n❌ Есть ошибки!")
+
+
+def test_content_sniffer():
+    """Тест определения типа файла по сигнатурам"""
+    print("\n" + "=" * 80)
+    print("🔍 ТЕСТ ОПРЕДЕЛЕНИЯ ТИПА ФАЙЛОВ")
+    print("=" * 80)
+    
+    bmp = b'BM' + (70).to_bytes(4, 'little') + b'\x00' * 4 + (54).to_bytes(4, 'little') \
+        + (40).to_bytes(4, 'little') + b'\x00' * 52
+    docx = b'PK\x03\x04' + b'\x00' * 26 + b'word/document.xml'
+    ooxml_no_marker = b'PK\x03\x04' + b'\x00' * 26 + b'[Content_Types].xml'
+    
+    # (описание, первые байты, расширение из имени, ожидаемое расширение, HTML)
+    cases = [
+        ("PDF", b'%PDF-1.7\n', '.pdf', '.pdf', False),
+        ("PDF с текстом ссылки 'Manual rev.3'", b'%PDF-1.4\n', '.3', '.pdf', False),
+        ("PNG", b'\x89PNG\r\n\x1a\n' + b'\x00' * 8, '', '.png', False),
+        ("JPEG с расширением .jpeg", b'\xff\xd8\xff\xe0', '.jpeg', '.jpg', False),
+        ("BMP", bmp, '', '.bmp', False),
+        ("Текст, начинающийся с 'BM'", b'BMW;X5;2020\n', '.csv', None, False),
+        ("CSV в cp1251, начинающийся с байт сигнатуры JPEG", b'\xff\xd8\xff;1;2\n', '.csv', None, False),
+        ("gzip под чужим расширением", b'\x1f\x8b\x08\x00', '.exe', '.gz', False),
+        ("TIFF под расширением .txt (нулевой байт - не текст)", b'II*\x00', '.txt', '.tif', False),
+        ("DOCX по содержимому", docx, '', '.docx', False),
+        ("DOCX без маркера в начале, по расширению", ooxml_no_marker, '.docx', '.docx', False),
+        ("ZIP без маркера Office", ooxml_no_marker, '.v2', '.zip', False),
+        ("XLS (OLE2) по расширению", b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', '.xls', '.xls', False),
+        ("HTML страница ошибки", b'\xef\xbb\xbf  <!DOCTYPE html><html>', '.pdf', '.html', True),
+        ("Неизвестный двоичный файл", b'\x00\x01\x02\x03', '.dat', None, False),
+    ]
+    
+    passed = True
+    for title, head, declared, expected, is_html in cases:
+        detected = sniff_content(head, declared)
+        ok = detected['extension'] == expected and detected['is_html'] == is_html
+        passed &= report(f"{title}: {detected['extension']}", ok)
+    
+    print("\n✅ Все тесты определения типа пройдены!" if passed else "\n❌ Есть ошибки!")
+
+
 async def interactive_menu():
     """Интерактивное меню тестов"""
     print("\n" + "=" * 80)
@@ -211,10 +328,12 @@ async def interactive_menu():
     print("  3. Тест парсинга одной категории")
     print("  4. Тест парсинга одного поста")
     print("  5. Тест утилит (даты, markdown, и т.д.)")
+    print("  6. Тест загрузки вложений (локальный сервер)")
+    print("  7. Тест определения типа файлов")
     print("  0. Запустить все тесты")
     print()
     
-    choice = input("Введите номер теста (0-5): ").strip()
+    choice = input("Введите номер теста (0-7): ").strip()
     
     if choice == "1":
         await test_connection()
@@ -226,17 +345,24 @@ async def interactive_menu():
         await test_parse_one_post()
     elif choice == "5":
         test_utils()
+    elif choice == "6":
+        await test_downloads()
+    elif choice == "7":
+        test_content_sniffer()
     elif choice == "0":
         await test_connection()
         await test_auth()
         await test_parse_one_category()
         test_utils()
+        await test_downloads()
+        test_content_sniffer()
     else:
         print("Неверный выбор!")
 
 
 if __name__ == "__main__":
     try:
+        setup_logging()
         asyncio.run(interactive_menu())
     except KeyboardInterrupt:
         print("\n\n⚠️  Тестирование прервано пользователем")
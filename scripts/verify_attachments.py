@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Проверка целостности скачанных вложений по экспорту форума
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import yaml
+
+# Добавить текущую директорию в PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from parser.attachment_verifier import AttachmentVerifier
+from parser.utils import setup_logging
+
+
+def main():
+    """Главная функция"""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('export_file', help='forum_structure_*.json или *.jsonl')
+    arg_parser.add_argument('--config', default='config/wix_config.yaml')
+    arg_parser.add_argument('--workers', type=int, default=None,
+                            help='количество процессов для хэширования')
+    arg_parser.add_argument('--report', default=None,
+                            help='сохранить полный отчет в JSON файл')
+    args = arg_parser.parse_args()
+    setup_logging()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    print("=" * 80)
+    print("🔍 ПРОВЕРКА ЦЕЛОСТНОСТИ ВЛОЖЕНИЙ")
+    print("=" * 80)
+    print()
+
+    verifier = AttachmentVerifier(config, workers=args.workers)
+    try:
+        report = verifier.verify(args.export_file)
+    finally:
+        verifier.close()
+
+    print()
+    print(f"   Проверено вложений: {report['checked']}")
+    print(f"   ✓ В порядке:        {report['ok']}")
+    print(f"   ✗ Отсутствуют:      {len(report['missing'])}")
+    print(f"   ✗ Повреждены:       {len(report['corrupt'])}")
+    print(f"   ⚠ Не скачаны:       {len(report['not_downloaded'])}")
+    print(f"   ⚠ Лишние файлы:     {len(report['orphaned'])}")
+    print()
+
+    for item in report['missing'][:20]:
+        print(f"   отсутствует: {item['filename']} ({item['post_id']}) → {item['local_path']}")
+    for item in report['corrupt'][:20]:
+        print(f"   поврежден [{item['reason']}]: {item['filename']} ({item['post_id']})")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print()
+        print(f"💾 Полный отчет: {args.report}")
+
+    if report['missing'] or report['corrupt']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()